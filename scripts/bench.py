@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+"""
+离线基准测试：不访问外网，测量 fetch_all 各阶段耗时与峰值内存
+- 语料：bench/fixtures/ 下录制的各数据源 RSS/HTML（`record` 子命令从线上录制）；缺失的源按模板合成
+- 本地替身服务器：每个原站点映射到一个回环地址，可注入延迟 / 失败 / 挂起，支持 ETag 304
+- 规模放大：--scale N 合成共 N 条条目（1万~10万级），含跨源近似重复
+- 输出：JSON 结果（含 git 提交号），`compare` 子命令对比两次结果、发现回归时返回非零
+- `scaling` 子命令：同一语料分别用串行与 1/2/4… 个进程做解析与增强（EXTRACT_WORKERS），报告加速比并校验结果一致
+- `selfcheck` 子命令：关键词扫描、默认画像打分、latest.json 流式写出、部分刷新时的新增/更新标记与旧实现的等价性检查
+
+用法：
+  python scripts/bench.py run --scale 20000 --latency 0.2 --fail Twitter --out bench/results/a.json
+  python scripts/bench.py record
+  python scripts/bench.py compare bench/results/a.json bench/results/b.json --threshold 0.2
+  python scripts/bench.py scaling --scale 50000 --workers 0,1,2,4
+  python scripts/bench.py selfcheck
+"""
+
+import os, re, sys, gc, json, time, random, shutil, argparse, resource, platform, tempfile, threading, tracemalloc, subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURE_DIR = os.path.join(ROOT, "bench", "fixtures")
+RESULT_DIR  = os.path.join(ROOT, "bench", "results")
+
+fa = None   # fetch_all 在设置好临时缓存目录后再导入（其路径常量在导入时确定）
+
+def load_collector(workdir):
+    global fa
+    os.environ["AGENT_CACHE_DIR"] = os.path.join(workdir, ".cache")
+    os.environ.setdefault("SEM_SCHOLAR_MIN_INTERVAL", "0")
+    os.environ.setdefault("PAPER_BUDGET_S", "30")
+    import fetch_all
+    fa = fetch_all
+    return fa
+
+def fixture_name(i, spec):
+    fn, url, tag, kw = spec
+    ext = "html" if fn.__name__ == "parse_html_simple" else "xml"
+    return f"{i:02d}-{re.sub(r'[^a-z0-9]+', '-', tag.lower()).strip('-')}.{ext}"
+
+# ========== 合成语料 ==========
+TOPICS = ["digital health", "health HCI", "patient experience", "health communication", "assistive technology",
+          "human-centered AI", "health informatics", "patient engagement", "clinical decision support",
+          "medical UX", "conversational agents for care", "information design for hospitals"]
+OFF_TOPICS = ["particle physics", "corporate finance", "medieval history", "soil chemistry", "quantum optics"]
+FUNDING = ["This is a fully funded studentship with a tax-free stipend.", "Self-funded applicants are welcome.",
+           "A tuition waiver and stipend are provided.", "Funding is subject to approval.", ""]
+COLLAB = ["The project runs in collaboration with the NHS.", "You will work with an industry partner.",
+          "Data collection takes place at a partner hospital.", ""]
+FILLER = ("the candidate will design study evaluate prototypes with users and clinicians across several sites "
+          "strong background in interaction design qualitative methods statistics programming is expected "
+          "applicants should hold a masters degree in a relevant field and show excellent written english").split()
+NAMES = ["Smith", "Jensen", "Müller", "Rossi", "Novak", "Larsen", "Chen", "Okafor"]
+MONTHS = ["January", "March", "May", "June", "September", "November"]
+
+def synth_entry(rng, tag, i, n, universities):
+    relevant = rng.random() < 0.75
+    topic = rng.choice(TOPICS if relevant else OFF_TOPICS)
+    uni = rng.choice(universities)
+    title = f"PhD {rng.choice(['studentship', 'position', 'candidate'])} in {topic} at {uni}"
+    desc = " ".join([
+        f"{uni} invites applications for a PhD on {topic}.",
+        " ".join(rng.choice(FILLER) for _ in range(rng.randint(20, 60))) + ".",
+        rng.choice(FUNDING), rng.choice(COLLAB),
+        f"Supervisor: Prof. {rng.choice(NAMES)}.",
+        f"Deadline: {rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(2026, 2028)}." if rng.random() < 0.7 else "",
+    ])
+    return {"title": title, "link": f"https://example.org/{re.sub(r'[^a-z0-9]+', '-', tag.lower())}/{i}/{n}", "description": desc}
+
+def synth_corpus(specs, total, seed=7, dup_rate=0.1):
+    """按源平均分配 total 条；dup_rate 比例的条目改写自其他源已出现的职位（标题微调、链接不同）"""
+    rng = random.Random(seed)
+    per = max(1, total // max(1, len(specs)))
+    pool, bodies = [], {}
+    for i, spec in enumerate(specs):
+        entries = []
+        for n in range(per):
+            if pool and rng.random() < dup_rate:
+                src = rng.choice(pool)
+                e = dict(src, title=src["title"].replace("PhD", "Funded PhD", 1),
+                         link=f"{src['link']}?via={i}")
+            else:
+                e = synth_entry(rng, spec[2], i, n, fa.UNIVERSITY_HINTS)
+                pool.append(e)
+            entries.append(e)
+        if spec[0].__name__ == "parse_html_simple":
+            # HTML 列表页只有链接文字；(源序号, 条目序号) 键下是对应的详情页
+            bodies[i] = render_html(entries, i)
+            bodies.update(((i, n), render_detail(e)) for n, e in enumerate(entries))
+        else:
+            bodies[i] = render_rss(entries, spec[2])
+    return bodies
+
+def render_rss(entries, tag):
+    items = "".join(
+        f"<item><title>{escape(e['title'])}</title><link>{escape(e['link'])}</link>"
+        f"<description>{escape(e['description'])}</description></item>\n" for e in entries)
+    return (f'<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel><title>{escape(tag)}</title>\n'
+            f"{items}</channel></rss>\n").encode("utf-8")
+
+def render_html(entries, i):
+    links = "".join(f'<li><a href="/d/{i}/{n}">{escape(e["title"])}</a></li>\n' for n, e in enumerate(entries))
+    return f"<html><body><ul>\n{links}</ul></body></html>\n".encode("utf-8")
+
+def render_detail(e):
+    return (f'<html><head><title>{escape(e["title"])}</title><meta name="description" content="{escape(e["title"])}">'
+            f"<script>window.ads = [];</script><style>body {{ margin: 0 }}</style></head><body>"
+            f"<header><nav>Home | Scholarships | PhD</nav></header><article><h1>{escape(e['title'])}</h1>"
+            f"<p>{escape(e['description'])}</p><dl><dt>Location</dt><dd>Europe</dd></dl></article>"
+            f"<footer>Share this post</footer></body></html>\n").encode("utf-8")
+
+def load_fixtures(specs, args):
+    """--scale 时全部合成；否则优先用 bench/fixtures 中录制的文件，缺失的源合成 30 条"""
+    if args.scale:
+        return synth_corpus(specs, args.scale, args.seed, args.dup_rate)
+    bodies = synth_corpus(specs, 30 * len(specs), args.seed, args.dup_rate)
+    for i, spec in enumerate(specs):
+        path = os.path.join(FIXTURE_DIR, fixture_name(i, spec))
+        if os.path.exists(path):
+            with open(path, "rb") as f: bodies[i] = f.read()
+    return bodies
+
+# ========== 本地替身服务器 ==========
+SEM_PAYLOAD = json.dumps({"data": [
+    {"title": "A study of patient-facing interfaces", "year": 2023, "citationCount": 12, "url": "https://example.org/p/1"},
+    {"title": "Designing for clinical workflows", "year": 2021, "citationCount": 40, "url": "https://example.org/p/2"},
+]}).encode("utf-8")
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *a): pass
+
+    def do_GET(self):
+        cfg = self.server.cfg
+        path = urlparse(self.path).path
+        if path.startswith("/s2"):
+            time.sleep(cfg["latency"])
+            return self._send(200, SEM_PAYLOAD, "application/json")
+        if path.startswith("/d/"):
+            body = cfg["bodies"].get(tuple(int(x) for x in path.split("/")[2:4]))
+            time.sleep(cfg["latency"])
+            return self._send(200, body, "text/html; charset=utf-8") if body else self._send(404, b"", None)
+        i = int(path.strip("/").split("/")[-1])
+        tag = cfg["tags"][i]
+        time.sleep(cfg["latency"] + cfg["rng"].random() * cfg["jitter"])
+        if tag in cfg["hang"]:
+            time.sleep(cfg["hang_s"])
+        if tag in cfg["fail"] or cfg["rng"].random() < cfg["fail_rate"]:
+            return self._send(503, b"unavailable", "text/plain")
+        body = cfg["bodies"][i]
+        etag = '"%s"' % fa.md5(body.decode("utf-8", "ignore"))
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", None, etag)
+        ctype = "text/html; charset=utf-8" if body.lstrip().startswith(b"<html") else "application/rss+xml; charset=utf-8"
+        self._send(200, body, ctype, etag)
+
+    def _send(self, status, body, ctype, etag=None):
+        try:
+            self.send_response(status)
+            if ctype: self.send_header("Content-Type", ctype)
+            if etag: self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body: self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def start_servers(specs, bodies, args):
+    """每个原站点一个回环地址（127.0.0.N），保留按站点限流的行为；无法绑定时退回 127.0.0.1"""
+    cfg = {"bodies": bodies, "tags": [s[2] for s in specs], "latency": args.latency, "jitter": args.jitter,
+           "fail": set(args.fail), "hang": set(args.hang), "hang_s": args.hang_s,
+           "fail_rate": args.fail_rate, "rng": random.Random(args.seed)}
+    hosts = {}
+    for spec in specs + [(None, fa.SEM_SCHOLAR_API, "s2", {})]:
+        hosts.setdefault(urlparse(spec[1]).netloc, None)
+    servers, addr = [], {}
+    for n, host in enumerate(hosts, start=1):
+        for ip in (f"127.0.0.{n}", "127.0.0.1"):
+            try:
+                srv = ThreadingHTTPServer((ip, 0), StandInHandler)
+                break
+            except OSError:
+                continue
+        srv.daemon_threads = True
+        srv.cfg = cfg
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        addr[host] = f"http://{ip}:{srv.server_address[1]}"
+    # HTML 源的相对链接也指向替身服务器（详情页补全）
+    bench_specs = [(fn, f"{addr[urlparse(url).netloc]}/f/{i}", tag, dict(kw, base=addr[urlparse(url).netloc]) if "base" in kw else kw)
+                   for i, (fn, url, tag, kw) in enumerate(specs)]
+    sem_api = f"{addr[urlparse(fa.SEM_SCHOLAR_API).netloc]}/s2/graph/v1/paper/search"
+    return servers, bench_specs, sem_api
+
+# ========== 分阶段测量 ==========
+def stage(results, name, fn, trace=True):
+    gc.collect()
+    if trace: tracemalloc.start()
+    t = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace: tracemalloc.stop()
+    n = len(out) if hasattr(out, "__len__") else None
+    results[name] = {"seconds": round(dt, 4), "peak_mb": round(peak / 1e6, 2) if trace else None, "items": n}
+    print(f"  {name:10s} {dt:9.3f}s  peak {peak / 1e6:9.1f} MB  items {n}")
+    return out
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="hci-bench-")
+    load_collector(workdir)
+    specs = fa.build_sources()
+    bodies = load_fixtures(specs, args)
+    servers, bench_specs, sem_api = start_servers(specs, bodies, args)
+    fa.SEM_SCHOLAR_API = sem_api
+    cwd = os.getcwd()
+    os.chdir(workdir)   # public/data 写到临时目录
+    trace = not args.no_tracemalloc
+    stages = {}
+    print(f"[bench] {sum(len(bodies[i]) for i in range(len(specs))) / 1e6:.1f} MB of fixtures across {len(specs)} sources; workdir {workdir}")
+    try:
+        t0 = time.perf_counter()
+        run_at = fa.now_iso()
+        stage(stages, "fetch", lambda: fa.gather_sources(bench_specs), trace)
+        raw = stage(stages, "parse", lambda: [   # bench_specs：HTML 源的相对链接指向替身服务器
+            it for i, (fn, url, tag, kw) in enumerate(bench_specs)
+            for it in (fa.parse_html_body(bodies[i].decode("utf-8", "replace"), tag, kw.get("base"))
+                       if fn.__name__ == "parse_html_simple" else fa.parse_rss_body(bodies[i], tag, kw.get("social", False)))
+        ], trace)
+        rel = stage(stages, "filter", lambda: [it for it in raw if fa.is_relevant(it)], trace)
+        uniq = stage(stages, "dedupe", lambda: list(fa.dedupe(rel)), trace)
+        canon = stage(stages, "near_dup", lambda: fa.cluster_near_duplicates(uniq), trace)
+        stage(stages, "enrich", lambda: [fa.enrich_item(x) for x in canon], trace)   # detect_* / calc_score
+        con = fa.open_store()
+        stage(stages, "store", lambda: fa.store_sync(con, canon, run_at)
+              or fa.store_mark_sources(con, [s[2] for s in specs], run_at, [s[2] for s in specs]) or canon, trace)   # 冷库：含增强与论文补查
+        ordered = stage(stages, "sort", lambda: list(fa.store_current(con, run_at)), trace)
+        stage(stages, "write", lambda: (fa.write_outputs(con, run_at), ordered)[1], trace)
+        stage(stages, "rank", lambda: fa.rank_profiles(ordered), trace)   # 全部画像一次批量打分
+        con.close()
+        total = time.perf_counter() - t0
+    finally:
+        os.chdir(cwd)
+        for srv in servers: srv.shutdown()
+        if not args.keep: shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"), "dirty": bool(_git("status", "--porcelain")),
+            "timestamp": datetime.now(timezone.utc).isoformat(), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "func"},
+        },
+        "stages": stages,
+        "total_seconds": round(total, 4),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    out = args.out or os.path.join(RESULT_DIR, f"{(result['meta']['commit'] or 'nogit')[:10]}-{args.scale or 'fixtures'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"[bench] total {total:.2f}s, max RSS {result['max_rss_mb']} MB -> {out}")
+
+# ========== 多进程抽取的扩展性 ==========
+def scaling(args):
+    load_collector(tempfile.mkdtemp(prefix="hci-bench-"))
+    specs = fa.build_sources()
+    bodies = load_fixtures(specs, args)
+    jobs = [(fa.parse_html_body, bodies[i].decode("utf-8", "replace"), tag, kw.get("base"))
+            if fn.__name__ == "parse_html_simple" else (fa.parse_rss_body, bodies[i], tag, kw.get("social", False))
+            for i, (fn, url, tag, kw) in enumerate(specs)]
+    workers = ([int(x) for x in args.workers.split(",")] if args.workers
+               else [0] + [n for n in (1, 2, 4, 8, 16, 32) if n <= (os.cpu_count() or 1)])
+    fa.EXTRACT_CHUNK = args.chunk
+    print(f"[bench] {sum(len(bodies[i]) for i in range(len(specs))) / 1e6:.1f} MB of fixtures, {os.cpu_count()} CPUs, chunk {args.chunk}")
+    print(f"  {'workers':>7s} {'startup s':>9s} {'parse s':>8s} {'enrich s':>8s} {'total s':>8s} {'speed-up':>8s}  output")
+    rows, base = [], None
+    for w in workers:
+        fa.EXTRACT_WORKERS = w
+        fa.shutdown_extract_pool()
+        t = time.perf_counter()
+        pool = fa.extract_pool()
+        if pool: list(pool.map(fa.clean_text, [""] * (4 * w)))   # 预热：进程启动与模块导入不计入
+        startup = time.perf_counter() - t
+        t = time.perf_counter()
+        with ThreadPoolExecutor(len(jobs)) as tp:   # 与抓取时相同：各来源线程并发调用 parse_body
+            parsed = list(tp.map(lambda j: fa.parse_body(*j), jobs))
+        t_parse = time.perf_counter() - t
+        rel = [it for part in parsed for it in part if fa.is_relevant(it)]
+        t = time.perf_counter()
+        enriched = fa.enrich_items(rel)
+        t_enrich = time.perf_counter() - t
+        fa.shutdown_extract_pool()
+        digest = fa.md5(json.dumps([[x.to_dict() for p in parsed for x in p], [x.to_json() for x in enriched]], ensure_ascii=False))
+        base = base or (t_parse + t_enrich, digest)
+        row = {"workers": w, "startup_s": round(startup, 3), "parse_s": round(t_parse, 3), "enrich_s": round(t_enrich, 3),
+               "items": len(enriched), "speedup": round(base[0] / (t_parse + t_enrich), 2), "same": digest == base[1]}
+        rows.append(row)
+        print(f"  {w:7d} {startup:9.2f} {t_parse:8.2f} {t_enrich:8.2f} {t_parse + t_enrich:8.2f} "
+              f"{row['speedup']:7.2f}x  {'same' if row['same'] else 'DIFFERS'}")
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"commit": _git("rev-parse", "HEAD"), "cpus": os.cpu_count(),
+                                "python": platform.python_version(), "args": {k: v for k, v in vars(args).items() if k != "func"}},
+                       "runs": rows}, f, ensure_ascii=False, indent=2)
+    if not all(r["same"] for r in rows):
+        print("[bench] parallel extraction output differs from the serial path")
+        sys.exit(1)
+
+# ========== 等价性自检 ==========
+def _check(name, ok, detail=""):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail and not ok else ""))
+    return ok
+
+EDGE_TEXTS = ["Clinical HCI at a hospital clinic", "HEALTH HCI and digital health UX", "ETH / EPFL human-centered AI",
+              "assistive technology, medical uxhealth communication", "self-funded, fully funded", ""]
+
+def check_matcher(items):
+    """KeywordMatcher 一次扫描的结果 == 逐词 `kw.lower() in text.lower()`，且命中位置确实是该词"""
+    m, bad = fa.MATCHER, 0
+    texts = [f"{it.get('title') or ''} {it.get('description') or ''}" for it in items] + EDGE_TEXTS
+    for text in texts:
+        low, hits = text.lower(), m.scan(text)
+        want = {(g, w) for t, gw in m.terms.items() if t in low for g, w in gw}
+        got = {(g, w) for g, hs in hits.items() for w, _ in hs}
+        misplaced = any(low[pos:pos + len(w)] != w.lower() for hs in hits.values() for w, pos in hs)
+        bad += want != got or misplaced
+    return _check("KeywordMatcher == per-term substring test", not bad, f"{bad} of {len(texts)} texts differ")
+
+def check_default_profile(enriched):
+    """default 画像分数 == 条目上的 calc_score；分别走增强时存下的 kw_hits 与排名器自己扫描（旧库条目）两条路径"""
+    want, ok = [it["score"] for it in enriched], True
+    for label, rows in (("kw_hits", enriched), ("rescan", [fa.Item.from_dict({k: v for k, v in it.to_dict().items()
+                                                                               if k != "kw_hits"}) for it in enriched])):
+        r = fa.ProfileRanker()
+        for it in rows: r.add(it)
+        got = r.scores()[r.names.index("default")]
+        diff = sum(a != b for a, b in zip(got, want)) + abs(len(got) - len(want))
+        ok &= _check(f"default profile == calc_score ({label})", not diff, f"{diff} of {len(want)} items differ")
+    return ok
+
+def check_latest_writer(enriched, workdir):
+    """LatestWriter 逐条写出 == json.dumps(整体, indent=2)，逐字节比较（含空列表与单条）"""
+    ok = True
+    for n in (0, 1, len(enriched)):
+        head = {"generated_at": "2025-06-01T00:00:00+00:00", "total": n}
+        path = os.path.join(workdir, f"latest-{n}.json")
+        w = fa.LatestWriter(path, head)
+        for it in enriched[:n]: w.add(it)
+        w.close()
+        with open(path, "rb") as f: got = f.read()
+        want = json.dumps(dict(head, items=[it.to_json() for it in enriched[:n]]), ensure_ascii=False, indent=2)
+        ok &= got == want.encode("utf-8")
+    return _check("LatestWriter == json.dumps(indent=2)", ok)
+
+def check_store_flags(items, workdir):
+    """全量 → 部分刷新（一个来源有改动 / 删除 / 新增，一个多 feed 来源有一条 feed 失败）→ 全量，
+    每轮比较库中当前条目的 is_new / is_updated 与按定义推出的结果"""
+    runs = ["2025-06-01T00:00:00+00:00", "2025-06-02T00:00:00+00:00", "2025-06-03T00:00:00+00:00"]
+    tags = sorted({it["source"] for it in items})
+    feeds = {}
+    for it in items: feeds.setdefault(it["source"], {}).setdefault(it["feed"], []).append(it)
+    a = next(t for t in tags if len(feeds[t]) == 1 and sum(map(len, feeds[t].values())) >= 3)
+    b = next(t for t in tags if len(feeds[t]) > 1)
+    con = fa.open_store(os.path.join(workdir, "flags.sqlite3"))
+    def flags(run_at):
+        return {it["id"]: (it["is_new"], it["is_updated"]) for it in fa.store_current(con, run_at)}
+    ok = True
+    try:
+        # 第 1 轮全量：全部新增
+        fa.store_sync(con, items, runs[0]); fa.store_mark_sources(con, tags, runs[0], tags)
+        want = {it["id"]: (True, False) for it in items}
+        ok &= _check("flags after a full run", flags(runs[0]) == want)
+        # 第 2 轮只刷新 a 与 b：a 改一条、删一条、加一条；b 的第一条 feed 失败，其条目原样保留
+        a_items = [it for it in items if it["source"] == a]
+        changed = a_items[0].copy(); changed["description"] = (changed.get("description") or "") + " Updated."
+        added = a_items[2].copy(); added["link"] += "#selfcheck"; added["id"] = fa.md5(added["link"])
+        missed = next(iter(feeds[b]))
+        b_items = [it for it in items if it["source"] == b and it["feed"] != missed]
+        fa.store_keep_feeds(con, {b: [missed]}, runs[1])
+        fa.store_sync(con, [changed] + a_items[2:] + [added] + b_items, runs[1])
+        fa.store_mark_sources(con, [a, b], runs[1])
+        want.pop(a_items[1]["id"])
+        want.update({it["id"]: (False, False) for it in a_items[2:] + [it for it in items if it["source"] == b]})
+        want[changed["id"]], want[added["id"]] = (False, True), (True, False)
+        ok &= _check("flags after a partial run with a failed feed", flags(runs[1]) == want)
+        # 第 3 轮全量、内容不变：没有任何标记
+        current = [changed] + a_items[2:] + [added] + [it for it in items if it["source"] != a]
+        fa.store_sync(con, current, runs[2]); fa.store_mark_sources(con, tags, runs[2], tags)
+        ok &= _check("flags after an unchanged full run", flags(runs[2]) == {k: (False, False) for k in want})
+    finally:
+        con.close()
+    return ok
+
+def selfcheck(args):
+    """把各处“与旧实现结果一致”的约定变成可运行的检查：合成语料 + 临时库，不访问网络；任一项不符返回非零"""
+    workdir = tempfile.mkdtemp(prefix="hci-bench-")
+    load_collector(workdir)
+    fa.USE_SEMANTIC_SCHOLAR, fa.DETAIL_TOP_N = False, 0
+    specs = fa.build_sources()
+    bodies = synth_corpus(specs, args.scale, args.seed, args.dup_rate)
+    raw = []
+    for i, (fn, url, tag, kw) in enumerate(specs):
+        part = (fa.parse_html_body(bodies[i].decode("utf-8", "replace"), tag, kw.get("base"))
+                if fn.__name__ == "parse_html_simple" else fa.parse_rss_body(bodies[i], tag, kw.get("social", False)))
+        for it in part: it["feed"] = url
+        raw += part
+    items = list(fa.dedupe(it for it in raw if fa.is_relevant(it)))
+    enriched = [fa.enrich_item(it) for it in items]
+    print(f"[bench] selfcheck on {len(raw)} synthetic entries ({len(items)} relevant); workdir {workdir}")
+    cwd = os.getcwd()
+    os.chdir(workdir)   # 空库不会从仓库里的 public/data/latest.json 建库
+    try:
+        results = [check_matcher(raw), check_default_profile(enriched), check_latest_writer(enriched, workdir),
+                   check_store_flags(items, workdir)]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not all(results):
+        print("[bench] selfcheck failed")
+        sys.exit(1)
+
+def _git(*cmd):
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+# ========== 录制 / 对比 ==========
+def record(args):
+    load_collector(tempfile.mkdtemp(prefix="hci-bench-"))
+    import requests
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for i, spec in enumerate(fa.build_sources()):
+        name = fixture_name(i, spec)
+        try:
+            r = requests.get(spec[1], timeout=20, headers={"User-Agent": "Mozilla/5.0"})
+            if r.status_code != 200 or not r.content: raise ValueError(f"HTTP {r.status_code}")
+            with open(os.path.join(FIXTURE_DIR, name), "wb") as f: f.write(r.content)
+            print(f"  - {name:32s} {len(r.content):8d} bytes")
+        except Exception as e:
+            print(f"  - {name:32s} skipped: {e}")
+
+def compare(args):
+    with open(args.old, encoding="utf-8") as f: old = json.load(f)
+    with open(args.new, encoding="utf-8") as f: new = json.load(f)
+    worse = []
+    print(f"{'stage':10s} {'old s':>9s} {'new s':>9s} {'ratio':>7s} {'old MB':>8s} {'new MB':>8s}")
+    for name, n in new["stages"].items():
+        o = old["stages"].get(name)
+        if not o: continue
+        ratio = n["seconds"] / o["seconds"] if o["seconds"] else float("inf")
+        print(f"{name:10s} {o['seconds']:9.3f} {n['seconds']:9.3f} {ratio:7.2f} "
+              f"{o.get('peak_mb') or 0:8.1f} {n.get('peak_mb') or 0:8.1f}")
+        if o["seconds"] >= args.min_seconds and ratio > 1 + args.threshold:
+            worse.append(name)
+    if worse:
+        print(f"[bench] regressions over {args.threshold:.0%}: {', '.join(worse)}")
+        sys.exit(1)
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark for scripts/fetch_all.py")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="run the pipeline against the local stand-in server")
+    p.add_argument("--scale", type=int, default=0, help="synthesize this many entries in total (e.g. 10000-100000)")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--dup-rate", type=float, default=0.1, help="share of cross-source near-duplicates")
+    p.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    p.add_argument("--jitter", type=float, default=0.05, help="extra random latency, seconds")
+    p.add_argument("--fail", nargs="*", default=[], help="source tags that always answer 503")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="random 503 probability for other requests")
+    p.add_argument("--hang", nargs="*", default=[], help="source tags that stall before answering")
+    p.add_argument("--hang-s", type=float, default=30.0)
+    p.add_argument("--no-tracemalloc", action="store_true", help="time only; skip per-stage peak memory")
+    p.add_argument("--keep", action="store_true", help="keep the temporary work directory")
+    p.add_argument("--out", help="result file (default bench/results/<commit>-<scale>.json)")
+    p.set_defaults(func=run)
+    p = sub.add_parser("record", help="record live feeds into bench/fixtures")
+    p.set_defaults(func=record)
+    p = sub.add_parser("compare", help="compare two result files")
+    p.add_argument("old"); p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown per stage")
+    p.add_argument("--min-seconds", type=float, default=0.05, help="ignore stages faster than this in the old run")
+    p.set_defaults(func=compare)
+    p = sub.add_parser("scaling", help="serial vs process-pool extraction speed-up by worker count")
+    p.add_argument("--scale", type=int, default=20000, help="synthesize this many entries in total")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--dup-rate", type=float, default=0.1)
+    p.add_argument("--workers", help="comma-separated worker counts, 0 = serial (default: 0,1,2,4… up to the CPU count)")
+    p.add_argument("--chunk", type=int, default=200, help="entries per process-pool task for enrichment")
+    p.add_argument("--out", help="optional result file")
+    p.set_defaults(func=scaling)
+    p = sub.add_parser("selfcheck", help="check the optimized paths against their reference behaviour")
+    p.add_argument("--scale", type=int, default=2000, help="synthesize this many entries in total")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--dup-rate", type=float, default=0.1)
+    p.set_defaults(func=selfcheck)
+    args = ap.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
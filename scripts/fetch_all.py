@@ -4,14 +4,39 @@ Health-HCI PhD Agent v3 (学术源 + 社交源)
 - 学术源：ETH CDHI / FindAPhD / EURAXESS / jobs.ac.uk / Academic Positions /
          Academic Transfer / PhDpositions.dk / Jobbnorge / OeAD / Scholarship Cafe / SIGCHI
 - 社交源：Twitter via Nitter RSS / LinkedIn via RSSHub（公开搜索）
-- 输出：public/data/latest.json（含 top10 + csv_block + by_source + items 全量）
-- 新增：大学识别增强 / 资助&合作推断 / ai_summary / 代表论文(可选) / 匹配评分基线
+- 输出：public/data/latest.json（含 top10 + csv_block + by_source + 在招条目）
+- 归档：截止日期已过或久未出现的条目按月写入 public/data/archive/YYYY-MM.json（archive/index.json 可按 id 查月份）
+- 新增：大学识别增强 / 资助&合作推断 / ai_summary / 代表论文(可选) / 匹配评分基线 / HTML 源详情页补全
+
+用法：
+  python scripts/fetch_all.py                        # 全量刷新
+  python scripts/fetch_all.py --sources social       # 只刷新社交源，其余来源沿用库中结果
+  python scripts/fetch_all.py --exclude OeAD-Jobs --dry-run
+  python scripts/fetch_all.py --list
+  python scripts/fetch_all.py --daemon               # 常驻：按各来源学到的变化频率分别轮询
 """
 
-import os, re, json, hashlib
-from urllib.parse import quote_plus
-from datetime import datetime, timezone
+import os, re, sys, json, codecs, random, argparse, gzip, time, zlib, heapq, base64, sqlite3, hashlib, operator, threading, multiprocessing
+from html.parser import HTMLParser
+from contextlib import contextmanager
+from array import array
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, TimeoutError as FuturesTimeout
+from urllib.parse import quote_plus, urlparse
+from datetime import datetime, timezone, timedelta
 import requests, feedparser
+try:
+    import brotli   # 可选：存在时额外写 .br
+except ImportError:
+    brotli = None
+try:
+    import resource  # 仅 Unix：读取进程峰值内存
+except ImportError:
+    resource = None
+try:
+    import numpy as np   # 可选：存在时多画像打分走向量化路径
+except ImportError:
+    np = None
 
 # ========== 偏好与常量 ==========
 PROFILE_KEYWORDS = [
@@ -34,8 +59,83 @@ SOCIAL_QUERIES = [
 NITTER_BASE = os.getenv("NITTER_BASE", "https://nitter.net")
 RSSHUB_BASE = os.getenv("RSSHUB_BASE", "https://rsshub.app")
 
+# 并发抓取：总线程数 / 单站点并发上限 / 整轮抓取时间预算（秒）
+FETCH_WORKERS   = int(os.getenv("FETCH_WORKERS", "8"))
+FETCH_PER_HOST  = int(os.getenv("FETCH_PER_HOST", "2"))
+FETCH_BUDGET_S  = float(os.getenv("FETCH_BUDGET_S", "120"))
+
+# 本地缓存目录（GitHub Actions 中由 actions/cache 跨运行保留）
+CACHE_DIR = os.getenv("AGENT_CACHE_DIR", ".cache")
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+HTTP_CACHE_MAX_AGE_DAYS = float(os.getenv("HTTP_CACHE_MAX_AGE_DAYS", "14"))
+HTTP_CACHE_MAX_MB       = float(os.getenv("HTTP_CACHE_MAX_MB", "64"))
+DATA_DIR    = os.path.join("public","data")
+LATEST_PATH = os.path.join(DATA_DIR, "latest.json")
+# 输出模式：single 只写 latest.json；sharded 只写 manifest + 分片；both 两者都写（默认，兼容旧前端）
+OUTPUT_MODE     = os.getenv("OUTPUT_MODE", "both")
+MANIFEST_PATH   = os.path.join(DATA_DIR, "manifest.json")
+SHARD_DIR       = os.path.join(DATA_DIR, "shards")
+SHARD_MAX_ITEMS = int(os.getenv("SHARD_MAX_ITEMS", "200"))
+SHARD_MAX_BYTES = int(os.getenv("SHARD_MAX_BYTES", str(256*1024)))
+# 运行指标：与 latest.json 同目录，保留最近 METRICS_HISTORY 轮
+METRICS_PATH    = os.path.join(DATA_DIR, "metrics.json")
+METRICS_HISTORY = int(os.getenv("METRICS_HISTORY", "30"))
+# 多画像排名：每个画像保留前 RANK_TOP_K 条
+RANKINGS_PATH   = os.path.join(DATA_DIR, "rankings.json")
+RANK_TOP_K      = int(os.getenv("RANK_TOP_K", "50"))
+# 前端搜索用的倒排索引（词 -> 条目序号）与分面；分数按 SCORE_BUCKET 分档
+SEARCH_INDEX_PATH = os.path.join(DATA_DIR, "search_index.json")
+SCORE_BUCKET      = 10
+# 本地条目库：按 id 记录内容哈希、首次/最近出现时间与增强结果
+STORE_PATH = os.path.join(CACHE_DIR, "items.sqlite3")
+# 归档：截止日期已过或超过 ARCHIVE_UNSEEN_DAYS 天未再出现的条目移出热输出，按月写入 archive/ 并建索引
+ARCHIVE_DIR         = os.path.join(DATA_DIR, "archive")
+ARCHIVE_INDEX_PATH  = os.path.join(ARCHIVE_DIR, "index.json")
+ARCHIVE_UNSEEN_DAYS = float(os.getenv("ARCHIVE_UNSEEN_DAYS", "45"))
+# 常驻轮询（--daemon）：各来源轮询间隔按其内容变化频率在上下限之间自适应，并加随机抖动
+SCHEDULE_PATH        = os.path.join(CACHE_DIR, "schedule.json")
+DAEMON_MIN_INTERVAL  = float(os.getenv("DAEMON_MIN_INTERVAL", str(15*60)))
+DAEMON_MAX_INTERVAL  = float(os.getenv("DAEMON_MAX_INTERVAL", str(48*3600)))
+DAEMON_JITTER        = float(os.getenv("DAEMON_JITTER", "0.1"))
+DAEMON_CONCURRENCY   = int(os.getenv("DAEMON_CONCURRENCY", "4"))     # 同时在途的请求数上限
+DAEMON_POLL_HISTORY  = 20
+# 识别/评分/摘要逻辑变更时递增：库中所有条目视为内容变化，重新增强
+ENRICH_VERSION = 1
+# 近似重复：估计 Jaccard 相似度阈值；分词数过少（如短推文）的条目不参与聚类
+NEAR_DUP_THRESHOLD  = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+NEAR_DUP_MIN_TOKENS = int(os.getenv("NEAR_DUP_MIN_TOKENS", "6"))
+# 单个 LSH 桶的成员上限：模板化文字（站点统一的招聘说明）会把大量条目挤进同一桶，超出后该桶不再参与比较
+NEAR_DUP_MAX_BUCKET = int(os.getenv("NEAR_DUP_MAX_BUCKET", "64"))
+# 数据源健康度：熔断阈值（连续失败次数）/ 首次熔断时长 / 最长熔断时长 / 自适应超时下限
+HEALTH_PATH       = os.path.join(CACHE_DIR, "health.json")
+HEALTH_WINDOW     = 20
+BREAKER_FAILURES  = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_BASE_S    = float(os.getenv("BREAKER_BASE_S", str(6*3600)))
+BREAKER_MAX_S     = float(os.getenv("BREAKER_MAX_S", str(7*86400)))
+TIMEOUT_MIN_S     = float(os.getenv("TIMEOUT_MIN_S", "4"))
+# 解析逻辑变更时递增：旧缓存中的 items 作废，改为用缓存的原文重新解析
+PARSER_VERSION = 4
+# 多进程抽取（可选）：EXTRACT_WORKERS>0 时整页解析与逐条增强交给进程池，按 EXTRACT_CHUNK 条分块；0 为串行
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0"))
+EXTRACT_CHUNK   = int(os.getenv("EXTRACT_CHUNK", "200"))
+
 USE_SEMANTIC_SCHOLAR = True
 SEM_SCHOLAR_API = "https://api.semanticscholar.org/graph/v1/paper/search"
+# 论文增强：结果缓存有效期 / 并发数 / 相邻请求最小间隔（无 API key 时约 1 req/s）/ 时间预算
+PAPER_CACHE_PATH         = os.path.join(CACHE_DIR, "papers.json")
+PAPER_CACHE_TTL_DAYS     = float(os.getenv("PAPER_CACHE_TTL_DAYS", "30"))
+SEM_SCHOLAR_WORKERS      = int(os.getenv("SEM_SCHOLAR_WORKERS", "2"))
+SEM_SCHOLAR_MIN_INTERVAL = float(os.getenv("SEM_SCHOLAR_MIN_INTERVAL", "1.0"))
+PAPER_BUDGET_S           = float(os.getenv("PAPER_BUDGET_S", "60"))
+# 详情页补全：HTML 列表源只有链接文字，对其中得分最高的 DETAIL_TOP_N 条抓取详情页（0 关闭）；
+# 并发数 / 时间预算 / 单页最多读取字节数与正文字数 / 解析结果缓存有效期
+DETAIL_TOP_N          = int(os.getenv("DETAIL_TOP_N", "20"))
+DETAIL_WORKERS        = int(os.getenv("DETAIL_WORKERS", "4"))
+DETAIL_BUDGET_S       = float(os.getenv("DETAIL_BUDGET_S", "30"))
+DETAIL_MAX_BYTES      = int(os.getenv("DETAIL_MAX_BYTES", str(512*1024)))
+DETAIL_MAX_CHARS      = int(os.getenv("DETAIL_MAX_CHARS", "4000"))
+DETAIL_CACHE_PATH     = os.path.join(CACHE_DIR, "details.json")
+DETAIL_CACHE_TTL_DAYS = float(os.getenv("DETAIL_CACHE_TTL_DAYS", "14"))
 
 # 覆盖欧洲+澳洲主流高校名，便于弱文本时识别
 UNIVERSITY_HINTS = [
@@ -58,48 +158,435 @@ UNIVERSITY_HINTS = [
   "University of Adelaide","University of Technology Sydney","University of Western Australia"
 ]
 
+# 各类检测用到的词表（统一交给 KeywordMatcher 一次扫描）
+FUNDING_TERMS = ["fully funded","full funding","studentship","stipend","scholarship","tuition waiver","tuition fee offset"]
+SELF_FUNDED_TERMS = ["self-funded"]
+FUNDED_LABEL_TERMS = ["funded","stipend","studentship","scholarship","full"]   # 作用于 funding 字段
+COLLAB_TERMS = ["hospital","clinic","nhs","health service","medical center","institute","industry","company",
+                "partner","collaboration","研究所","医院","企业","产学研"]
+TOPIC_TERMS = ["health","medical","clinic","hci","human-computer","ux","assistive","human-centered","digital"]
+HTML_TOPIC_TERMS = ["health","medical","clinic","hci","ux","assistive","human-centered","digital"]
+PHD_TERMS = ["phd","studentship"]
+TOP_UNI_TERMS = ["eth","epfl","kth","aalto","tudelft","imperial","oxford","cambridge"]  # 作用于 university 字段
+
+# 申请人画像：关键词 / 偏好地区 / 偏好高校（作用于 university 字段）及权重；未写的权重沿用默认值。
+# default 与 calc_score 完全一致（条目上的 score 字段即 default 分数）
+DEFAULT_WEIGHTS = {"base_academic": BASE_SCORE_ACADEMIC, "base_social": BASE_SCORE_SOCIAL, "title": SCORE_TITLE_HIT,
+                   "desc": SCORE_DESC_HIT, "region": SCORE_REGION_BONUS, "funded": SCORE_FUNDED_BONUS, "uni": 5}
+PROFILES = {
+    "default": {"label": "Default 默认", "keywords": PROFILE_KEYWORDS, "regions": REGION_PREFER,
+                "universities": TOP_UNI_TERMS},
+    "eth": {"label": "ETH focus 苏黎世", "regions": ["Switzerland","Germany","Austria"],
+            "keywords": PROFILE_KEYWORDS + ["human-computer interaction","mobile health","wearable",
+                                            "behavior change","digital biomarker"],
+            "universities": ["eth","epfl","university of zurich","university of bern"],
+            "weights": {"region": 10, "uni": 15}},
+    "melbourne": {"label": "Melbourne focus 墨尔本", "regions": ["Australia"],
+                  "keywords": PROFILE_KEYWORDS + ["co-design","participatory design","health literacy",
+                                                  "visual communication","service design"],
+                  "universities": ["university of melbourne","monash","rmit","university of sydney","unsw"],
+                  "weights": {"region": 15, "uni": 15}},
+}
+
 def md5(s): return hashlib.md5((s or "").encode("utf-8","ignore")).hexdigest()
 def now_iso(): return datetime.now(timezone.utc).isoformat()
 
-def http_get(url, timeout=18, headers=None):
+def _read_json(path, default=None):
+    """读 JSON 文件；不存在或损坏时返回 default"""
     try:
-        r = requests.get(url, timeout=timeout, headers=headers or {"User-Agent":"Mozilla/5.0"})
-        if r.status_code == 200: return r.text
+        with open(path, "r", encoding="utf-8") as f: return json.load(f)
     except Exception:
-        pass
-    return ""
+        return default
+
+def _write_json_atomic(path, obj, **kw):
+    """先写临时文件再替换，中断时不留半截文件；kw 传给 json.dump（indent / separators）"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(obj, f, ensure_ascii=False, **kw)
+    os.replace(tmp, path)
+
+_host_slots, _host_guard = {}, threading.Lock()
+
+def host_slot(url):
+    """同一站点共享一个信号量，避免多条 FindAPhD 查询同时压同一主机"""
+    host = urlparse(url).netloc.lower()
+    with _host_guard:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(FETCH_PER_HOST)
+        return _host_slots[host]
+
+# ========== 运行指标（按来源 / 阶段 / 外部 API 累计，写入 metrics.json） ==========
+METRICS, _metrics_lock = {"sources": {}, "stages": {}, "apis": {}, "feeds": {}}, threading.Lock()
+
+def reset_metrics():
+    with _metrics_lock:
+        for v in METRICS.values(): v.clear()
+
+def metric_source(tag, status=None, **inc):
+    """按来源累加计数（请求数、字节、耗时、缓存命中等）；status 计入 HTTP 状态分布"""
+    with _metrics_lock:
+        st = METRICS["sources"].setdefault(tag, {})
+        for k, v in inc.items(): st[k] = st.get(k, 0) + v
+        if status is not None:
+            codes = st.setdefault("status", {})
+            codes[str(status)] = codes.get(str(status), 0) + 1
+
+_FEED_STATES = ("ok", "failed", "skipped")
+
+def metric_feed(url, tag, state):
+    """按 feed URL 记录本轮结果 (来源, ok / failed / skipped)；只升级不降级：
+    失败后不再记为成功，超出预算被跳过后迟到的结果也不算"""
+    with _metrics_lock:
+        old = METRICS["feeds"].get(url)
+        if old is None or _FEED_STATES.index(state) > _FEED_STATES.index(old[1]):
+            METRICS["feeds"][url] = (tag, state)
+
+def metric_add_stage(name, seconds):
+    with _metrics_lock:
+        METRICS["stages"][name] = METRICS["stages"].get(name, 0) + seconds
+
+_END = object()
+
+def metered(name, fn, items=None):
+    """管线阶段计时：fn(上游迭代器) 返回生成器或列表；只累计本阶段自身耗时，扣除等待上游的时间"""
+    waited = [0.0]
+    def feed():
+        it = iter(items)
+        while True:
+            t = time.perf_counter()
+            x = next(it, _END)
+            waited[0] += time.perf_counter() - t
+            if x is _END: return
+            yield x
+    t = time.perf_counter()
+    out = fn() if items is None else fn(feed())
+    if isinstance(out, list):
+        metric_add_stage(name, time.perf_counter() - t - waited[0])
+        return out
+    return _metered_gen(name, out, waited)
+
+def _metered_gen(name, gen, waited):
+    spent = 0.0
+    try:
+        while True:
+            t, w = time.perf_counter(), waited[0]
+            x = next(gen, _END)
+            spent += time.perf_counter() - t - (waited[0] - w)
+            if x is _END: return
+            yield x
+    finally:
+        metric_add_stage(name, spent)
+
+@contextmanager
+def metric_stage(name):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric_add_stage(name, time.perf_counter() - t)
+
+def metric_api(name, seconds, ok=True):
+    with _metrics_lock:
+        st = METRICS["apis"].setdefault(name, {"calls": 0, "errors": 0, "latencies": []})
+        st["calls"] += 1
+        st["errors"] += 0 if ok else 1
+        st["latencies"].append(seconds)
+
+def peak_rss_mb():
+    if resource is None: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # Linux 为 KB，macOS 为字节
+    return round(rss / (1024*1024 if sys.platform == "darwin" else 1024), 1)
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return round(xs[min(len(xs)-1, int(q*len(xs)))], 3) if xs else None
+
+def write_metrics(run_at, total_s, by_source, path=None, refreshed=None):
+    """本轮指标追加到 metrics.json 的滚动历史；返回本轮记录"""
+    path = path or METRICS_PATH
+    with _metrics_lock:
+        sources = {}
+        for tag, st in METRICS["sources"].items():
+            sources[tag] = {k: (round(v, 3) if isinstance(v, float) else v) for k, v in st.items()}
+        for tag in set(sources) | set(by_source):
+            sources.setdefault(tag, {})["kept"] = by_source.get(tag, 0)
+        apis = {k: {"calls": v["calls"], "errors": v["errors"], "total_s": round(sum(v["latencies"]), 3),
+                    "p50_s": _pct(v["latencies"], .5), "p95_s": _pct(v["latencies"], .95),
+                    "max_s": round(max(v["latencies"]), 3) if v["latencies"] else None}
+                for k, v in METRICS["apis"].items()}
+        stages = {k: round(v, 3) for k, v in METRICS["stages"].items()}
+    health = {url: health_summary(url) for url in list(HEALTH)}
+    run = {"generated_at": run_at, "total_s": round(total_s, 3), "peak_rss_mb": peak_rss_mb(),
+           "items": sum(by_source.values()), "stages": stages, "sources": sources, "apis": apis,
+           "health": health}
+    if refreshed is not None: run["refreshed"] = refreshed   # 部分刷新时记录本轮刷新的来源
+    history = ((_read_json(path) or {}).get("history", []) + [run])[-METRICS_HISTORY:]
+    _write_json_atomic(path, {"schema": 1, "history": history}, separators=(",",":"))
+    return run
+
+# ========== 数据源健康度（熔断 + 自适应超时） ==========
+HEALTH, _health_lock = {}, threading.Lock()
+
+def load_health(path=None):
+    data = _read_json(path or HEALTH_PATH, {})
+    with _health_lock:
+        HEALTH.clear(); HEALTH.update(data)
+
+def save_health(path=None):
+    with _health_lock:
+        _write_json_atomic(path or HEALTH_PATH, HEALTH, indent=1)
+
+def source_timeout(url, default):
+    """按该源最近成功请求的 p95 延迟 ×3 设超时（样本不足时用默认值），不超过默认值"""
+    with _health_lock:
+        lat = [x[2] for x in HEALTH.get(url, {}).get("history", []) if x[1]]
+    if len(lat) < 5: return default
+    return max(TIMEOUT_MIN_S, min(default, 3 * _pct(lat, .95)))
+
+def health_allow(url):
+    """熔断中且未到探测时间则跳过；到点后放行一次探测（半开）"""
+    with _health_lock:
+        return time.time() >= HEALTH.get(url, {}).get("open_until", 0)
+
+def health_record(url, tag, ok, latency):
+    with _health_lock:
+        h = HEALTH.setdefault(url, {"tag": tag, "history": [], "failures": 0})
+        h["tag"] = tag
+        h["history"] = (h["history"] + [[round(time.time()), ok, round(latency, 3)]])[-HEALTH_WINDOW:]
+        if ok:
+            h.update(failures=0, last_success=now_iso(), open_until=0)
+        else:
+            h["failures"] += 1
+            if h["failures"] >= BREAKER_FAILURES:
+                # 每多失败一次，熔断时长翻倍
+                backoff = min(BREAKER_MAX_S, BREAKER_BASE_S * 2 ** (h["failures"] - BREAKER_FAILURES))
+                h["open_until"] = time.time() + backoff
+
+def health_summary(url):
+    with _health_lock:
+        h = HEALTH.get(url)
+        if not h: return None
+        hist = h["history"]
+        lat = [x[2] for x in hist if x[1]]
+        return {"tag": h["tag"], "success_rate": round(sum(1 for x in hist if x[1]) / len(hist), 2) if hist else None,
+                "p50_s": _pct(lat, .5), "p95_s": _pct(lat, .95), "last_success": h.get("last_success"),
+                "failures": h["failures"], "open_until": h.get("open_until") or None}
+
+# ========== HTTP 条件请求缓存（ETag / Last-Modified） ==========
+_pending_entries = {}
+
+def _cache_path(url): return os.path.join(HTTP_CACHE_DIR, md5(url) + ".json.gz")
+
+def cache_load(url):
+    path = _cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > HTTP_CACHE_MAX_AGE_DAYS * 86400: return None
+        with gzip.open(path, "rt", encoding="utf-8") as f: return json.load(f)
+    except Exception:
+        return None
+
+def cache_store(url, items):
+    """解析完成后写入缓存：校验头 + 原文 + 解析结果"""
+    ent = _pending_entries.pop(url, None)
+    if ent is None: return
+    ent.update({"url": url, "parser": PARSER_VERSION, "items": [it.to_dict() for it in items], "stored_at": now_iso()})
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    path = _cache_path(url); tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f: json.dump(ent, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp): os.remove(tmp)
+
+def cached_get(url, source, timeout=18, binary=False):
+    """条件 GET。返回 (body, items)：
+    - 304 或正文未变 → (None, 缓存的 items)，调用方直接复用，跳过解析与增强
+    - 200 → (body, None)，调用方解析后调用 cache_store(url, items)
+    - 失败 → (空串, None)"""
+    ent = cache_load(url)
+    headers = {"User-Agent":"Mozilla/5.0"}
+    if ent:
+        if ent.get("etag"): headers["If-None-Match"] = ent["etag"]
+        if ent.get("last_modified"): headers["If-Modified-Since"] = ent["last_modified"]
+    empty = b"" if binary else ""
+    t = time.perf_counter()
+    try:
+        with host_slot(url):
+            t = time.perf_counter()  # 不计排队等待同站点空位的时间
+            r = requests.get(url, timeout=source_timeout(url, timeout), headers=headers)
+        dt = time.perf_counter() - t
+        metric_source(source, status=r.status_code, requests=1, fetch_s=dt, bytes=len(r.content))
+        health_record(url, source, r.status_code in (200, 304), dt)
+    except Exception as e:
+        dt = time.perf_counter() - t
+        metric_source(source, status=type(e).__name__, requests=1, fetch_s=dt, cache_error=1)
+        health_record(url, source, False, dt)
+        metric_feed(url, source, "failed")
+        return empty, None
+    if r.status_code == 304 and ent:
+        body = base64.b64decode(ent.get("body",""))
+    elif r.status_code == 200:
+        body = r.content
+    else:
+        metric_source(source, cache_error=1)
+        metric_feed(url, source, "failed")
+        return empty, None
+    # 服务器不支持条件请求时，正文哈希相同也视为命中
+    digest = hashlib.md5(body).hexdigest()
+    if ent and ent.get("digest") == digest and ent.get("parser") == PARSER_VERSION and "items" in ent:
+        metric_source(source, cache_hit=1)
+        os.utime(_cache_path(url))  # 刷新时间戳，供按时间淘汰
+        return None, [Item.from_dict(d) for d in ent["items"]]
+    metric_source(source, cache_miss=1)
+    _pending_entries[url] = {
+        "etag": r.headers.get("ETag") or (ent or {}).get("etag"),
+        "last_modified": r.headers.get("Last-Modified") or (ent or {}).get("last_modified"),
+        "digest": digest,
+        "encoding": r.encoding or (ent or {}).get("encoding"),
+        "body": base64.b64encode(body).decode("ascii"),
+    }
+    enc = _pending_entries[url]["encoding"] or "utf-8"
+    return (body if binary else body.decode(enc, "replace")), None
+
+def cache_prune():
+    """按时间与总大小淘汰缓存文件（最久未命中的先删）"""
+    if not os.path.isdir(HTTP_CACHE_DIR): return
+    files=[]
+    for name in os.listdir(HTTP_CACHE_DIR):
+        path = os.path.join(HTTP_CACHE_DIR, name)
+        try: st = os.stat(path)
+        except OSError: continue
+        if time.time() - st.st_mtime > HTTP_CACHE_MAX_AGE_DAYS * 86400 or name.endswith(".tmp"):
+            os.remove(path); continue
+        files.append((st.st_mtime, st.st_size, path))
+    total, limit = sum(f[1] for f in files), HTTP_CACHE_MAX_MB * 1024 * 1024
+    for _, size, path in sorted(files):
+        if total <= limit: break
+        os.remove(path); total -= size
 
 def clean_text(s):
     s = re.sub(r"<[^>]+>", " ", s or "", flags=re.S)
     return re.sub(r"\s+", " ", s).strip()
 
-def try_semantic_papers(query, limit=2):
+_sem_lock, _sem_next_at, _sem_throttled = threading.Lock(), [0.0], threading.Event()
+
+def _sem_wait(deadline):
+    """全局限速：预约下一个请求时隙；若时隙超出预算或已被限流，返回 False"""
+    if _sem_throttled.is_set(): return False
+    with _sem_lock:
+        at = max(time.monotonic(), _sem_next_at[0])
+        if at >= deadline: return False
+        _sem_next_at[0] = at + SEM_SCHOLAR_MIN_INTERVAL
+    time.sleep(max(0.0, at - time.monotonic()))
+    return True
+
+def try_semantic_papers(query, limit=2, deadline=None):
+    """查询代表论文；失败/超预算返回 None（不写缓存），无结果返回 []"""
     if not USE_SEMANTIC_SCHOLAR: return []
+    deadline = time.monotonic() + 12 if deadline is None else deadline
+    if not _sem_wait(deadline): return None
     try:
         url = f"{SEM_SCHOLAR_API}?query={quote_plus(query)}&limit=5&fields=title,year,authors,citationCount,url"
-        js = requests.get(url, timeout=12).json()
+        t = time.perf_counter()
+        try:
+            r = requests.get(url, timeout=max(1.0, min(12, deadline - time.monotonic())))
+        except Exception:
+            metric_api("semantic_scholar", time.perf_counter() - t, ok=False)
+            raise
+        metric_api("semantic_scholar", time.perf_counter() - t, ok=r.status_code == 200)
+        if r.status_code == 429:
+            _sem_throttled.set()  # 被限流后本轮不再请求，剩余条目跳过
+            return None
+        js = r.json()
         if not js or "data" not in js: return []
-        data = sorted(js["data"], key=lambda x:(x.get("year",0), x.get("citationCount",0)), reverse=True)
+        data = sorted(js["data"], key=lambda x:(x.get("year") or 0, x.get("citationCount") or 0), reverse=True)
         out=[]
         for p in data[:limit]:
             out.append(f"{p.get('title','')} ({p.get('year','')}, cites={p.get('citationCount',0)}) {p.get('url','')}")
         return out
     except Exception:
-        return []
+        return None
+
+# ========== 关键词匹配（单次扫描） ==========
+def _trie_regex(words):
+    """把词表编译成 trie 形正则，每个位置的匹配代价与词表大小无关"""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w: node = node.setdefault(ch, {})
+        node[""] = True
+    def build(node):
+        alts = [re.escape(ch) + build(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts: return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+    return build(trie)
+
+class KeywordMatcher:
+    """多组词表合并成一个预编译正则，对文本只扫描一次，返回 {组名: [(原词, 位置), ...]}。
+    每个位置取最长命中，再补上同起点的前缀词，结果与逐词 `kw.lower() in text.lower()` 一致。"""
+    def __init__(self, groups):
+        self.terms = {}
+        for g, words in groups.items():
+            for w in words:
+                if w: self.terms.setdefault(w.lower(), []).append((g, w))
+        self.prefixes = {t: [p for p in self.terms if t.startswith(p)] for t in self.terms}
+        self.regex = re.compile("(?=(" + _trie_regex(self.terms) + "))")
+
+    def scan(self, text):
+        hits = {}
+        for m in self.regex.finditer((text or "").lower()):
+            pos = m.start()
+            for p in self.prefixes[m.group(1)]:
+                for g, w in self.terms[p]:
+                    hits.setdefault(g, []).append((w, pos))
+        return hits
 
-def detect_university(text):
-    t = text.lower()
-    for u in UNIVERSITY_HINTS:
-        if u.lower() in t: return u
+# 各画像关键词的并集：增强时一并扫描，画像排名直接复用命中结果
+RANK_KEYWORDS = sorted({kw.lower() for p in PROFILES.values() for kw in p.get("keywords", ())})
+
+MATCHER = KeywordMatcher({
+    "profile": PROFILE_KEYWORDS, "rank": RANK_KEYWORDS, "university": UNIVERSITY_HINTS, "region": REGION_PREFER,
+    "funding": FUNDING_TERMS, "self_funded": SELF_FUNDED_TERMS, "funded_label": FUNDED_LABEL_TERMS,
+    "collab": COLLAB_TERMS, "topic": TOPIC_TERMS, "html_topic": HTML_TOPIC_TERMS,
+    "phd": PHD_TERMS, "top_uni": TOP_UNI_TERMS,
+})
+_UNI_RANK = {u: i for i, u in enumerate(UNIVERSITY_HINTS)}
+
+# funding / university / location 这类短字段取值有限，扫描结果直接缓存
+scan_field = lru_cache(maxsize=4096)(MATCHER.scan)
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+def tokenize(text):
+    """与 KeywordMatcher 相同的归一化（小写）后按词切分；近似重复签名与搜索索引共用"""
+    return _WORD_RE.findall((text or "").lower())
+
+def hit_terms(hits, group):
+    return {w for w, _ in hits.get(group, ())}
+
+def keyword_hits(title, hits, group="rank"):
+    """title + " " + description 的扫描结果按位置分成 [标题命中, 正文命中]（小写、排序），与 calc_score 的划分一致"""
+    tl, in_title, in_desc = len(title.lower()), set(), set()
+    for kw, pos in hits.get(group, ()):
+        kw = kw.lower()
+        if pos + len(kw) <= tl: in_title.add(kw)
+        if pos > tl: in_desc.add(kw)
+    return [sorted(in_title), sorted(in_desc)]
+
+def detect_university(text, hits=None):
+    hits = MATCHER.scan(text) if hits is None else hits
+    found = hit_terms(hits, "university")
+    if found: return min(found, key=_UNI_RANK.get)
     # 兜底：常见 “University of X”
     m = re.search(r"(University of [A-Z][A-Za-z\- ]+)", text)
     return m.group(1) if m else ""
 
-def detect_funding(text, source):
-    t = text.lower()
-    if any(w in t for w in ["fully funded","full funding","studentship","stipend","scholarship","tuition waiver","tuition fee offset"]):
+def detect_funding(text, source, hits=None):
+    hits = MATCHER.scan(text) if hits is None else hits
+    if hits.get("funding"):
         return "Funded/Studentship/Stipend (detected)"
-    if "self-funded" in t: return "Self-funded (detected)"
+    if hits.get("self_funded"): return "Self-funded (detected)"
     # 对典型源做友好推断（FindAPhD/EURAXESS/jobs.ac.uk/Academic Positions 等常见 funded）
     if source in {"FindAPhD","EURAXESS","jobs.ac.uk","Academic Positions","Academic Transfer","Jobbnorge"}:
         return "Often funded on these portals (check details)"
@@ -109,31 +596,43 @@ def detect_deadline(text):
     m = re.search(r"(deadline|apply by|closing date)[^\d]*(\d{1,2}\s+\w+\s+\d{4}|\d{4}-\d{1,2}-\d{1,2})", text, flags=re.I)
     return m.group(2) if m else "Rolling"
 
-def detect_collab(text):
-    keys = ["hospital","clinic","nhs","health service","medical center","institute","industry","company",
-            "partner","collaboration","研究所","医院","企业","产学研"]
-    t = text.lower()
-    hits = sorted({k for k in keys if k in t})
-    return (len(hits)>0), hits
+_MONTHS = ("january", "february", "march", "april", "may", "june", "july",
+           "august", "september", "october", "november", "december")
 
-def calc_score(item, social=False, source=""):
+@lru_cache(maxsize=4096)
+def normalize_deadline(deadline):
+    """detect_deadline 的结果转成 YYYY-MM-DD；月份接受全称与任意 3 字母以上的缩写（Sept / Sept.）；
+    Rolling 或无法识别时返回空串"""
+    s = re.sub(r"\s+", " ", (deadline or "").strip())
+    m = re.fullmatch(r"(\d{1,2}) ([A-Za-z]{3,})\.? (\d{4})", s)
+    if m:
+        mon = next((i for i, name in enumerate(_MONTHS, 1) if name.startswith(m.group(2).lower())), 0)
+        if mon: s = f"{m.group(3)}-{mon}-{m.group(1)}"
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return ""
+
+def detect_collab(text, hits=None):
+    hits = MATCHER.scan(text) if hits is None else hits
+    found = sorted(hit_terms(hits, "collab"))
+    return (len(found)>0), found
+
+def is_funded_label(funding):
+    return bool(scan_field(funding or "").get("funded_label"))
+
+def calc_score(item, social=False, source="", hits=None):
+    """hits 为 title + " " + description 的扫描结果；按命中位置区分标题/正文"""
     base = BASE_SCORE_SOCIAL if social else BASE_SCORE_ACADEMIC
-    title = (item.get("title") or "").lower()
-    desc  = (item.get("description") or "").lower()
-    where = (item.get("location") or "").lower()
-    funding = (item.get("funding") or "").lower()
-    score = base
-    for kw in PROFILE_KEYWORDS:
-        k = kw.lower()
-        if k in title: score += SCORE_TITLE_HIT
-        if k in desc:  score += SCORE_DESC_HIT
-    for rg in REGION_PREFER:
-        if rg.lower() in (where or ""): score += SCORE_REGION_BONUS
-    if any(w in funding for w in ["funded","stipend","studentship","scholarship","full"]):
+    title = item.get("title") or ""
+    if hits is None: hits = MATCHER.scan(title + " " + (item.get("description") or ""))
+    in_title, in_desc = keyword_hits(title, hits, "profile")
+    score = base + SCORE_TITLE_HIT*len(in_title) + SCORE_DESC_HIT*len(in_desc)
+    score += SCORE_REGION_BONUS * len(hit_terms(scan_field(item.get("location") or ""), "region"))
+    if is_funded_label(item.get("funding")):
         score += SCORE_FUNDED_BONUS
     # 轻微偏向 ETH / EPFL / KTH 等
-    uni = (item.get("university") or "").lower()
-    if any(u.lower() in uni for u in ["eth","epfl","kth","aalto","tudelft","imperial","oxford","cambridge"]):
+    if scan_field(item.get("university") or "").get("top_uni"):
         score += 5
     return score
 
@@ -159,207 +658,1333 @@ def ai_summary(item):
     src  = item.get("source") or "source"
     return f"PhD at {uni} — {kws}. {fund}{coll}. {sup}. ({src})"
 
-# ========== RSS/HTML 抽取 ==========
+# ========== 多画像批量打分（稀疏特征矩阵） ==========
+class ProfileRanker:
+    """逐条把条目转成稀疏特征行（CSR：命中的特征列号），全部读完后用一次矩阵乘法给所有画像打分，
+    输出各画像的 Top-K。特征：来源类型、标题/正文命中的关键词、地区、是否资助、画像偏好高校。"""
+    def __init__(self, profiles=None, top_k=None, run_at=None):
+        self.run_at = run_at
+        profiles = PROFILES if profiles is None else profiles
+        self.names, self.top_k = list(profiles), RANK_TOP_K if top_k is None else top_k
+        self.profiles, cols, weights = profiles, {}, []
+        def col(key): return cols.setdefault(key, len(cols))
+        kws, regions, unis = set(), set(), set()
+        for p in self.names:
+            spec = profiles[p]
+            w, wp = dict(DEFAULT_WEIGHTS, **spec.get("weights", {})), {}
+            wp[col(("base", False))], wp[col(("base", True))] = w["base_academic"], w["base_social"]
+            for kw in spec.get("keywords", ()):
+                wp[col(("title", kw.lower()))], wp[col(("desc", kw.lower()))] = w["title"], w["desc"]
+            for r in spec.get("regions", ()): wp[col(("region", r.lower()))] = w["region"]
+            wp[col(("funded",))] = w["funded"]
+            wp[col(("uni", p))] = w["uni"]
+            weights.append(wp)
+            kws.update(spec.get("keywords", ())); regions.update(spec.get("regions", ()))
+            unis.update(spec.get("universities", ()))
+        self.cols = cols
+        # 权重矩阵：特征 × 画像
+        self.W = [[wp.get(c, 0) for wp in weights] for c in range(len(cols))]
+        self.matcher = KeywordMatcher({"kw": kws, "region": regions, "uni": unis})
+        # 画像关键词都在 RANK_KEYWORDS 中时直接用增强阶段存下的 kw_hits，否则（自定义画像）自己扫描
+        self.own_scan = not {k.lower() for k in kws} <= set(RANK_KEYWORDS)
+        self.scan_field = lru_cache(maxsize=4096)(self.matcher.scan)
+        self.unis = {p: {u.lower() for u in profiles[p].get("universities", ())} for p in self.names}
+        self.indptr, self.indices = array("l", [0]), array("l")
+        self.ids, self.funded = [], array("b")
+
+    def add(self, it):
+        cols = self.cols
+        row = {cols[("base", bool(it.get("social")))]}
+        kh = None if self.own_scan else it.get("kw_hits")
+        if kh is None:   # 旧库中还没有 kw_hits 的条目
+            title = it.get("title") or ""
+            kh = keyword_hits(title, self.matcher.scan(title + " " + (it.get("description") or "")), "kw")
+        row.update(cols.get(("title", kw), -1) for kw in kh[0])
+        row.update(cols.get(("desc", kw), -1) for kw in kh[1])
+        for r, _ in self.scan_field(it.get("location") or "").get("region", ()):
+            row.add(cols[("region", r.lower())])
+        funded = is_funded_label(it.get("funding"))
+        if funded: row.add(cols[("funded",)])
+        uh = {u.lower() for u, _ in self.scan_field(it.get("university") or "").get("uni", ())}
+        if uh:
+            row.update(cols[("uni", p)] for p in self.names if self.unis[p] & uh)
+        row.discard(-1)
+        self.indices.extend(sorted(row)); self.indptr.append(len(self.indices))
+        self.ids.append(it["id"]); self.funded.append(funded)
+
+    def scores(self):
+        """[画像][条目] 分数矩阵；有 numpy 时对每行的非零列一次 reduceat 求和"""
+        n = len(self.ids)
+        if not n: return [[] for _ in self.names]
+        if np is not None:
+            W = np.asarray(self.W, dtype=np.int64)
+            idx = np.frombuffer(self.indices, dtype=f"i{self.indices.itemsize}")
+            # 每行至少有来源类型这一列，不存在空行（reduceat 对空段的结果不正确）
+            S = np.add.reduceat(W[idx], np.frombuffer(self.indptr, dtype=idx.dtype)[:-1], axis=0)
+            return S.T.tolist()
+        ptr, idx = self.indptr, self.indices
+        out = []
+        for k in range(len(self.names)):
+            w = [row[k] for row in self.W]
+            out.append([sum(map(w.__getitem__, idx[ptr[i]:ptr[i+1]])) for i in range(n)])
+        return out
+
+    def rankings(self):
+        """各画像 Top-K：与主列表相同，资助优先，再按分数降序，同分保持原顺序"""
+        out = {}
+        for p, sc in zip(self.names, self.scores()):
+            top = heapq.nsmallest(self.top_k, range(len(sc)), key=lambda i: (-self.funded[i], -sc[i], i))
+            spec = self.profiles[p]
+            out[p] = {"label": spec.get("label", p), "keywords": list(spec.get("keywords", ())),
+                      "regions": list(spec.get("regions", ())),
+                      "top": [[self.ids[i], sc[i]] for i in top]}
+        return out
+
+    def close(self):
+        data = {"generated_at": self.run_at or now_iso(), "top_k": self.top_k, "profiles": self.rankings()}
+        write_compressed(RANKINGS_PATH, _compact(data))
+        return data
+
+def rank_profiles(items, profiles=None, top_k=None):
+    r = ProfileRanker(profiles, top_k)
+    for it in items: r.add(it)
+    return r.rankings()
+
+# ========== 条目模型 ==========
+ITEM_SCHEMA = 2   # 库与解析缓存中的条目格式；v1（无 "v" 字段）还带有已渲染的 summary / ai_summary
+
+class Item:
+    """一条职位：固定字段（__slots__），来源 / 资助 / 截止等高度重复的取值做字符串驻留。
+    summary / ai_summary / CSV 行只在写输出时渲染；保留按字段名的 get / [] 访问，未设置的字段视为缺失。"""
+    __slots__ = ("id", "title", "link", "description", "source", "social", "links",
+                 "university", "supervisor", "keywords", "funding", "deadline", "collab", "eligibility", "location",
+                 "score", "papers", "feed", "kw_hits", "is_new", "is_updated")
+    _FIELDS = frozenset(__slots__)
+    _INTERN = frozenset(("source", "university", "funding", "deadline", "eligibility", "location"))
+    _STORE_ONLY = frozenset(("feed", "kw_hits"))   # 只存库，不输出给前端
+
+    def __init__(self, **kw):
+        for k, v in kw.items(): self[k] = v
+
+    def __setitem__(self, k, v):
+        if k in self._INTERN and isinstance(v, str): v = sys.intern(v)
+        elif k in ("keywords", "collab") and v: v = [sys.intern(x) for x in v]
+        setattr(self, k, v)
+
+    def __getitem__(self, k):
+        try:
+            return getattr(self, k)
+        except AttributeError:
+            raise KeyError(k) from None
+
+    def __delitem__(self, k):
+        delattr(self, k)
+
+    def __contains__(self, k):
+        return k in self._FIELDS and hasattr(self, k)
+
+    def get(self, k, default=None):
+        return getattr(self, k, default) if k in self._FIELDS else default
+
+    def copy(self):
+        new = Item.__new__(Item)
+        for k in self.__slots__:
+            if hasattr(self, k): setattr(new, k, getattr(self, k))
+        return new
+
+    def to_dict(self):
+        """库 / 解析缓存用的紧凑格式：不含渲染字段与每轮计算的标记"""
+        d = {k: getattr(self, k) for k in self.__slots__ if k not in RUN_FLAGS and hasattr(self, k)}
+        d["v"] = ITEM_SCHEMA
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        """读入库 / 缓存 / 上一轮 latest.json 中的条目：v1 的渲染字段与未知字段不在 _FIELDS 中，直接丢弃（输出时重新渲染）；
+        更新版本写入的条目字段含义未知，直接报错而不是静默读错"""
+        ver = d.get("v", 1)
+        if ver > ITEM_SCHEMA: raise ValueError(f"item schema v{ver} is newer than supported v{ITEM_SCHEMA}")
+        it = cls()
+        for k, v in d.items():
+            if k in cls._FIELDS: it[k] = v
+        return it
+
+    def to_json(self, **extra):
+        """前端读取的格式（与之前的 dict 条目字段一致）：增强过的条目在此渲染 summary / ai_summary，
+        并附上规范化的截止日期 deadline_date（YYYY-MM-DD，未知为空串）"""
+        d = {}
+        for k in self.__slots__:
+            if k in self._STORE_ONLY: continue
+            if k == "papers" and hasattr(self, "score"):
+                d["summary"], d["ai_summary"] = make_summary(self), ai_summary(self)
+            if hasattr(self, k): d[k] = getattr(self, k)
+            if k == "deadline" and hasattr(self, k): d["deadline_date"] = normalize_deadline(self.deadline)
+        d.update(extra)
+        return d
+
+    def csv_row(self):
+        return [self.get("university",""), "", self.get("supervisor",""), ", ".join((self.get("keywords") or [])[:8]),
+                self.get("location",""), self.get("funding",""), self.get("eligibility",""), self.get("deadline",""),
+                self.get("link",""), self.get("source","")]
+
+# ========== RSS/HTML 抽取（只取原始字段，识别与评分见 enrich_item） ==========
 def parse_rss(url, tag_name, social=False):
+    # 先用带超时的条件 GET 下载，再交给 feedparser（feedparser.parse(url) 无超时）
+    body, cached = cached_get(url, tag_name, binary=True)
+    if cached is not None: return cached
+    items = parse_body(parse_rss_body, body, tag_name, social) if body else []
+    if body: cache_store(url, items)
+    return items
+
+def parse_rss_body(body, tag_name, social=False):
     items=[]
-    feed = feedparser.parse(url)
+    feed = feedparser.parse(body)
     for e in feed.entries:
         title = clean_text(getattr(e,"title",""))
         link  = getattr(e,"link","")
         summ  = clean_text(getattr(e,"summary","") or getattr(e,"description",""))
-        raw   = (title + " " + summ)
-        item = {
-            "id": md5(link or title),
-            "title": title,
-            "link": link,
-            "description": summ,
-            "source": tag_name,
-            "social": social,
-        }
-        # 识别大学/导师/关键词/资助/截止/合作
-        item["university"]  = detect_university(raw)
-        m_sup = re.search(r"(Prof\.?\s*[A-Z][A-Za-z\-]+|Dr\.?\s*[A-Z][A-Za-z\-]+)", summ)
-        item["supervisor"]  = m_sup.group(0) if m_sup else ""
-        kws=[]
-        for kw in PROFILE_KEYWORDS:
-            if kw.lower() in raw.lower(): kws.append(kw)
-        item["keywords"]    = sorted(list(set(kws)))
-        item["funding"]     = detect_funding(raw, tag_name)
-        item["deadline"]    = detect_deadline(raw)
-        has_coll, hits      = detect_collab(raw)
-        item["collab"]      = hits if has_coll else []
-        item["eligibility"] = ""  # 可后续针对站点模板增强
-        item["location"]    = ""  # 若站点有专门字段，可扩展
-        # 分数与摘要
-        item["score"]       = calc_score(item, social=social, source=tag_name)
-        item["summary"]     = make_summary(item)
-        item["ai_summary"]  = ai_summary(item)
-        # 代表论文（尽量不阻塞）
-        if item["university"]:
-            try:
-                item["papers"] = try_semantic_papers(f"{item['university']} {title}")[:2]
-            except Exception:
-                item["papers"]=[]
-        else:
-            item["papers"]=[]
-        items.append(item)
+        items.append(Item(
+            id=md5(link or title),
+            title=title,
+            link=link,
+            description=summ,
+            source=tag_name,
+            social=social,
+        ))
     return items
 
 def parse_html_simple(url, tag_name, base=None,
-                      pattern=r'<a\s+href="([^"]+)"[^>]*>(.*?)</a >'):
-    html = http_get(url, timeout=15)
+                      pattern=r'<a\s+href="([^"]+)"[^>]*>(.*?)</a\s*>'):
+    html, cached = cached_get(url, tag_name, timeout=15)
+    if cached is not None: return cached
+    items = parse_body(parse_html_body, html, tag_name, base, pattern) if html else []
+    if html: cache_store(url, items)
+    return items
+
+def parse_html_body(html, tag_name, base=None,
+                    pattern=r'<a\s+href="([^"]+)"[^>]*>(.*?)</a\s*>'):
     items=[]
     for m in re.finditer(pattern, html, flags=re.I|re.S):
         lnk = m.group(1); ttl = clean_text(m.group(2))
         if base and lnk.startswith("/"): lnk = base + lnk
-        t = (ttl or "").lower()
-        if not any(k in t for k in ["phd","studentship"]): continue
-        if not any(k in t for k in ["health","medical","clinic","hci","ux","assistive","human-centered","digital"]): continue
-        raw = ttl
-        it = {
-            "id": md5(lnk or ttl),
-            "title": ttl,
-            "link": lnk,
-            "description": "",
-            "source": tag_name,
-            "social": False,
-        }
-        it["university"]  = detect_university(raw)
-        it["supervisor"]  = ""
-        it["keywords"]    = []
-        it["funding"]     = detect_funding(raw, tag_name)
-        it["deadline"]    = "Rolling"
-        it["collab"]      = []
-        it["eligibility"] = ""
-        it["location"]    = ""
-        it["score"]       = calc_score(it, social=False, source=tag_name)
-        it["summary"]     = make_summary(it)
-        it["ai_summary"]  = ai_summary(it)
-        it["papers"]      = []
-        items.append(it)
+        hits = MATCHER.scan(ttl)
+        if not hits.get("phd") or not hits.get("html_topic"): continue
+        items.append(Item(
+            id=md5(lnk or ttl),
+            title=ttl,
+            link=lnk,
+            description="",
+            source=tag_name,
+            social=False,
+        ))
+    return items
+
+def enrich_item(it):
+    """识别大学/导师/关键词/资助/截止/合作并评分（原文只扫描一次）；摘要在写输出时才渲染"""
+    item = it.copy()
+    title, summ, tag_name = item.get("title",""), item.get("description",""), item.get("source","")
+    raw  = f"{title} {summ}" if summ else title
+    hits = MATCHER.scan(raw)
+    item["university"]  = detect_university(raw, hits)
+    m_sup = re.search(r"(Prof\.?\s*[A-Z][A-Za-z\-]+|Dr\.?\s*[A-Z][A-Za-z\-]+)", summ)
+    item["supervisor"]  = m_sup.group(0) if m_sup else ""
+    item["keywords"]    = sorted(hit_terms(hits, "profile"))
+    item["kw_hits"]     = keyword_hits(title, hits)   # 画像排名用，不输出
+    item["funding"]     = detect_funding(raw, tag_name, hits)
+    item["deadline"]    = detect_deadline(raw)
+    has_coll, coll      = detect_collab(raw, hits)
+    item["collab"]      = coll if has_coll else []
+    item["eligibility"] = item.get("eligibility") or ""  # 详情页补全时可能带有
+    item["location"]    = item.get("location") or ""
+    item["score"]       = calc_score(item, social=item.get("social", False), source=tag_name, hits=hits)
+    item["papers"]      = []  # 代表论文在过滤去重后由 enrich_papers 补充
+    return item
+
+# ========== 多进程抽取（可选，EXTRACT_WORKERS>0） ==========
+_extract_pool, _extract_lock = None, threading.Lock()
+
+def extract_pool():
+    """懒创建进程池；用 spawn 启动，避免在抓取线程运行中 fork"""
+    global _extract_pool
+    if EXTRACT_WORKERS <= 0: return None
+    with _extract_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _extract_pool
+
+def shutdown_extract_pool():
+    global _extract_pool
+    with _extract_lock:
+        if _extract_pool is not None: _extract_pool.shutdown()
+        _extract_pool = None
+
+def parse_body(fn, *args):
+    """整页解析（feedparser / HTML 正则 + clean_text）；开启多进程时在进程池中执行，抓取线程只等待结果"""
+    pool = extract_pool()
+    return fn(*args) if pool is None else pool.submit(fn, *args).result()
+
+def _enrich_chunk(chunk):
+    return [enrich_item(it) for it in chunk]
+
+def enrich_items(items):
+    """批量 enrich_item：开启多进程时按 EXTRACT_CHUNK 分块分发，结果与串行逐条调用相同、顺序不变"""
+    pool = extract_pool()
+    if pool is None or len(items) <= EXTRACT_CHUNK: return _enrich_chunk(items)
+    chunks = [items[i:i+EXTRACT_CHUNK] for i in range(0, len(items), EXTRACT_CHUNK)]
+    return [e for part in pool.map(_enrich_chunk, chunks) for e in part]
+
+# ========== 代表论文增强（过滤去重后执行） ==========
+def cached_lookups(name, keys, lookup, cache_path, ttl_days, workers, budget_s):
+    """带持久缓存、并发受限且整体限时的批量查询。lookup(key, 旧缓存条目, deadline) 返回新缓存条目（含 ts），
+    失败或超出预算返回 None（不写缓存，下轮再查）。返回 {key: 缓存条目}"""
+    cache, ttl = _read_json(cache_path, {}), ttl_days * 86400
+    found, todo = {}, []
+    for k in keys:
+        ent = cache.get(k)
+        if ent and time.time() - ent.get("ts", 0) < ttl: found[k] = ent
+        else: todo.append(k)
+
+    skipped = 0
+    if todo:
+        deadline = time.monotonic() + budget_s
+        pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        futs = {pool.submit(lookup, k, cache.get(k), deadline): k for k in todo}
+        done, _ = wait(futs, timeout=budget_s + 1)
+        pool.shutdown(wait=False, cancel_futures=True)
+        for f, k in futs.items():
+            ent = f.result() if f in done else None
+            if ent is None:
+                skipped += 1; continue
+            cache[k] = found[k] = ent
+        _write_json_atomic(cache_path, {k: v for k, v in cache.items() if time.time() - v.get("ts", 0) < ttl})
+    print(f"[fetch_all] {name}: {len(keys)} queries, {len(keys)-len(todo)} cached, "
+          f"{len(todo)-skipped} fetched, {skipped} skipped")
+    return found
+
+def enrich_papers(items, budget_s=None):
+    """为保留下来的条目补充代表论文：相同 university+title 只查一次，结果按 TTL 持久缓存；
+    查询并发执行且全局限速，超出时间预算的查询直接跳过（papers 留空，下轮再补）。"""
+    for it in items:
+        if "papers" not in it: it["papers"] = []
+    if not USE_SEMANTIC_SCHOLAR: return items
+    with metric_stage("papers"):
+        return _enrich_papers(items, PAPER_BUDGET_S if budget_s is None else budget_s)
+
+def _paper_lookup(query, ent, deadline):
+    papers = try_semantic_papers(query, 2, deadline)
+    return None if papers is None else {"ts": time.time(), "papers": papers[:2]}
+
+def _enrich_papers(items, budget_s):
+    groups = {}
+    for it in items:
+        if it.get("university"):
+            groups.setdefault(f"{it['university']} {it.get('title','')}", []).append(it)
+    found = cached_lookups("papers", list(groups), _paper_lookup, PAPER_CACHE_PATH, PAPER_CACHE_TTL_DAYS,
+                           SEM_SCHOLAR_WORKERS, budget_s)
+    for q, ent in found.items():
+        for it in groups[q]: it["papers"] = ent["papers"]
     return items
 
+# ========== 详情页补全（HTML 列表源） ==========
+class DetailParser(HTMLParser):
+    """流式解析详情页：逐块 feed，收集可见正文（跳过 script/style/nav/header/footer 等）与 meta 描述；
+    正文够 DETAIL_MAX_CHARS 后置 done，调用方即可停止下载"""
+    SKIP  = frozenset(("script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form"))
+    BLOCK = frozenset(("p", "div", "br", "li", "dt", "dd", "tr", "td", "th", "h1", "h2", "h3", "h4", "section", "article"))
+    FIELDS = (("location", r"location|place of (?:work|study)|based in|city"),
+              ("eligibility", r"eligibility|who can apply|entry requirements|requirements"))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip, self.parts, self.size, self.meta, self.done = 0, [], 0, "", False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif tag == "meta" and not self.meta:
+            a = dict(attrs)
+            if (a.get("name") or a.get("property") or "").lower() in ("description", "og:description"):
+                self.meta = a.get("content") or ""
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.skip or self.done: return
+        self.parts.append(data); self.size += len(data)
+        if self.size >= DETAIL_MAX_CHARS: self.done = True
+
+    def fields(self):
+        """正文 + 按 “标签: 值” 行（或标签与值分处相邻两块，如 dt/dd）取出的地点 / 资格要求"""
+        lines = [x for x in (clean_text(l) for l in "".join(self.parts).split("\n")) if x]
+        out = {"description": " ".join(lines)[:DETAIL_MAX_CHARS] or clean_text(self.meta)}
+        for key, label in self.FIELDS:
+            for i, line in enumerate(lines):
+                m = re.match(rf"(?:{label})\s*(?::\s*(.*))?$", line, flags=re.I)
+                if not m: continue
+                val = m.group(1) or (lines[i+1] if i + 1 < len(lines) else "")
+                if val: out[key] = val[:200]; break
+        return out
+
+def _page_encoding(r, head):
+    """响应头声明了 charset 就用它；否则（requests 对 text/html 默认按 ISO-8859-1）看首块里的 <meta charset>，再退回 utf-8"""
+    if "charset" in (r.headers.get("Content-Type") or "").lower() and r.encoding:
+        enc = r.encoding
+    else:
+        m = re.search(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", head[:4096], flags=re.I)
+        enc = m.group(1).decode("ascii") if m else "utf-8"
+    try:
+        return codecs.lookup(enc).name
+    except LookupError:
+        return "utf-8"
+
+def fetch_detail(url, ent=None, deadline=None):
+    """条件 GET 详情页并边下载边解析（最多 DETAIL_MAX_BYTES，正文够了即停）；
+    304 或已读部分的内容哈希与缓存相同则沿用缓存的解析结果。返回缓存条目，失败或读到一半超时返回 None"""
+    deadline = time.monotonic() + 15 if deadline is None else deadline
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if ent and ent.get("etag"): headers["If-None-Match"] = ent["etag"]
+    t = time.perf_counter()
+    try:
+        with host_slot(url):
+            t = time.perf_counter()
+            r = requests.get(url, timeout=max(1.0, min(15, deadline - time.monotonic())), headers=headers, stream=True)
+            try:
+                if r.status_code == 304 and ent:
+                    metric_api("detail_page", time.perf_counter() - t, ok=True)
+                    return dict(ent, ts=time.time())
+                if r.status_code != 200:
+                    metric_api("detail_page", time.perf_counter() - t, ok=False)
+                    return None
+                digest, parser, n, decode = hashlib.md5(), DetailParser(), 0, None
+                for chunk in r.iter_content(16384):
+                    digest.update(chunk); n += len(chunk)
+                    if decode is None: decode = codecs.getincrementaldecoder(_page_encoding(r, chunk))("replace").decode
+                    parser.feed(decode(chunk))
+                    if parser.done or n >= DETAIL_MAX_BYTES: break
+                    if time.monotonic() > deadline:
+                        # 超时截断的正文不完整：按失败处理，不写入缓存
+                        metric_api("detail_page", time.perf_counter() - t, ok=False)
+                        return None
+            finally:
+                r.close()
+    except Exception:
+        metric_api("detail_page", time.perf_counter() - t, ok=False)
+        return None
+    metric_api("detail_page", time.perf_counter() - t, ok=True)
+    digest = digest.hexdigest()
+    fields = ent["fields"] if ent and ent.get("digest") == digest else parser.fields()
+    return {"ts": time.time(), "etag": r.headers.get("ETag"), "digest": digest, "fields": fields}
+
+def enrich_details(items, budget_s=None):
+    """只有链接文字的条目（描述为空）中，取得分最高的 DETAIL_TOP_N 条抓取详情页，
+    合并正文 / 地点 / 资格要求后重新识别与评分。返回 {id: 补全后的条目}"""
+    if DETAIL_TOP_N <= 0 or not items: return {}
+    with metric_stage("details"):
+        return _enrich_details(items, DETAIL_BUDGET_S if budget_s is None else budget_s)
+
+def _enrich_details(items, budget_s):
+    top = heapq.nlargest(DETAIL_TOP_N, (it for it in items if (it.get("link") or "").startswith("http")),
+                         key=lambda it: it.get("score") or 0)
+    found = cached_lookups("details", list(dict.fromkeys(it["link"] for it in top)), fetch_detail,
+                           DETAIL_CACHE_PATH, DETAIL_CACHE_TTL_DAYS, DETAIL_WORKERS, budget_s)
+    out = {}
+    for it in top:
+        f = found.get(it["link"], {}).get("fields")
+        if not f or not f.get("description"): continue
+        raw = it.copy()
+        for k, v in f.items(): raw[k] = v
+        out[it["id"]] = enrich_item(raw)
+    print(f"[fetch_all] details: {len(out)} of {len(top)} candidates re-scored")
+    return out
+
 # ========== 聚合所有数据源 ==========
-def gather_sources():
-    out=[]
+def build_sources():
+    """按固定顺序列出所有数据源：(解析函数, url, 标签, 参数)；合并结果时沿用此顺序"""
+    specs=[]
 
     # --- 学术站 ---
-    out += parse_rss("https://www.c4dhi.org/feed/", "ETH CDHI")
+    specs.append((parse_rss, "https://www.c4dhi.org/feed/", "ETH CDHI", {}))
     # FindAPhD（带关键词的RSS）
     for q in ["health%20HCI","digital%20health%20UX","assistive%20technology%20HCI",
               "human-centred%20AI%20health","medical%20UX"]:
-        out += parse_rss(f"https://www.findaphd.com/phds/rss/?Keywords={q}", "FindAPhD")
+        specs.append((parse_rss, f"https://www.findaphd.com/phds/rss/?Keywords={q}", "FindAPhD", {}))
     # EURAXESS
     for q in ["digital%20health%20PhD","human-computer%20interaction%20health","assistive%20technology%20PhD"]:
-        out += parse_rss(f"https://euraxess.ec.europa.eu/rss/calls?keywords={q}", "EURAXESS")
+        specs.append((parse_rss, f"https://euraxess.ec.europa.eu/rss/calls?keywords={q}", "EURAXESS", {}))
     # jobs.ac.uk
-    out += parse_rss("https://www.jobs.ac.uk/search/?keywords=phd+health+HCI&sort=relevance&format=rss", "jobs.ac.uk")
+    specs.append((parse_rss, "https://www.jobs.ac.uk/search/?keywords=phd+health+HCI&sort=relevance&format=rss", "jobs.ac.uk", {}))
     # Academic Positions
-    out += parse_rss("https://academicpositions.com/find-jobs/rss?positions=phd&keywords=health%20HCI%20digital%20health%20UX", "Academic Positions")
+    specs.append((parse_rss, "https://academicpositions.com/find-jobs/rss?positions=phd&keywords=health%20HCI%20digital%20health%20UX", "Academic Positions", {}))
     # Academic Transfer（NL）
-    out += parse_rss("https://www.academictransfer.com/en/search-rss/?keywords=phd%20digital%20health%20hci", "Academic Transfer")
+    specs.append((parse_rss, "https://www.academictransfer.com/en/search-rss/?keywords=phd%20digital%20health%20hci", "Academic Transfer", {}))
     # PhDpositions.dk（DK）
-    out += parse_rss("https://www.phd-positions.dk/rss/?s=health%20HCI", "PhDpositions.dk")
+    specs.append((parse_rss, "https://www.phd-positions.dk/rss/?s=health%20HCI", "PhDpositions.dk", {}))
     # Jobbnorge（NO）
-    out += parse_rss("https://www.jobbnorge.no/en/search?SearchText=PhD%20health%20HCI&format=rss", "Jobbnorge")
+    specs.append((parse_rss, "https://www.jobbnorge.no/en/search?SearchText=PhD%20health%20HCI&format=rss", "Jobbnorge", {}))
     # OeAD（AT，全量RSS，靠关键词过滤）
-    out += parse_rss("https://oead.at/en/rss", "OeAD Jobs")
+    specs.append((parse_rss, "https://oead.at/en/rss", "OeAD Jobs", {}))
     # Scholarship Cafe（HTML 简单抓）
-    out += parse_html_simple("https://www.scholarshipscafe.com/search/label/PhD", "Scholarship Cafe", base="https://www.scholarshipscafe.com")
+    specs.append((parse_html_simple, "https://www.scholarshipscafe.com/search/label/PhD", "Scholarship Cafe", {"base": "https://www.scholarshipscafe.com"}))
     # SIGCHI via Nitter（SIGCHI 主页RSS）
-    out += parse_rss(f"{NITTER_BASE}/SIGCHI/rss", "SIGCHI")
+    specs.append((parse_rss, f"{NITTER_BASE}/SIGCHI/rss", "SIGCHI", {}))
 
     # --- 社交 ---
     for q in SOCIAL_QUERIES:
-        out += parse_rss(f"{NITTER_BASE}/search/rss?f=tweets&q={quote_plus(q)}", "Twitter", social=True)
+        specs.append((parse_rss, f"{NITTER_BASE}/search/rss?f=tweets&q={quote_plus(q)}", "Twitter", {"social": True}))
+    specs.append((parse_rss, f"{RSSHUB_BASE}/linkedin/jobs/search/{quote_plus('PhD health HCI digital health')}", "LinkedIn", {"social": True}))
+
+    return specs
+
+def _run_source(spec):
+    fn, url, tag, kw = spec
+    if not health_allow(url):
+        metric_source(tag, breaker_skipped=1)
+        metric_feed(url, tag, "failed")
+        return []
+    t = time.perf_counter()
     try:
-        out += parse_rss(f"{RSSHUB_BASE}/linkedin/jobs/search/{quote_plus('PhD health HCI digital health')}", "LinkedIn", social=True)
-    except Exception:
-        pass
+        items = fn(url, tag, **kw)
+    except Exception as e:
+        print(f"[fetch_all] {tag} failed: {e!r}")
+        metric_feed(url, tag, "failed")
+        items = []
+    metric_feed(url, tag, "ok")   # 已记为失败的不受影响
+    for it in items: it["feed"] = url
+    t1 = time.perf_counter()
+    # 廉价的相关性过滤在抓取线程里就做掉，不相关条目不进入后续阶段
+    rel = [it for it in items if is_relevant(it)]
+    metric_add_stage("filter", time.perf_counter() - t1)
+    metric_source(tag, wall_s=t1 - t, parsed=len(items), relevant=len(rel))
+    return rel
+
+def iter_sources(specs=None, budget_s=None, workers=None):
+    """并发抓取全部数据源，按 build_sources() 的顺序逐个来源产出相关条目（与串行抓取输出一致）。
+    单站点并发受 FETCH_PER_HOST 限制，整体受时间预算约束。"""
+    specs = build_sources() if specs is None else specs
+    budget_s = FETCH_BUDGET_S if budget_s is None else budget_s
+    load_health()
+    for fn, url, tag, kw in specs:
+        if not health_allow(url):
+            h = health_summary(url)
+            print(f"[fetch_all] {tag} circuit open after {h['failures']} failures, next probe "
+                  f"{datetime.fromtimestamp(h['open_until'], timezone.utc).isoformat(timespec='minutes')} ({url})")
+    deadline = time.monotonic() + budget_s
+    pool = ThreadPoolExecutor(max_workers=max(1, workers or FETCH_WORKERS))
+    futs = [pool.submit(_run_source, s) for s in specs]
+    try:
+        for i, (fn, url, tag, kw) in enumerate(specs):
+            try:
+                items = futs[i].result(timeout=max(0, deadline - time.monotonic()))
+            except FuturesTimeout:
+                metric_source(tag, skipped=1)
+                metric_feed(url, tag, "skipped")
+                print(f"[fetch_all] {tag} skipped: over {budget_s:.0f}s budget ({url})")
+                continue
+            futs[i] = None   # 产出后即释放该来源的结果
+            yield from items
+    finally:
+        # 未开始的任务直接取消；已在下载的请求受各自 timeout 约束，不再等待其结果
+        pool.shutdown(wait=False, cancel_futures=True)
+        save_health()
+
+def gather_sources(specs=None, budget_s=None):
+    return list(iter_sources(specs, budget_s))
+
+# ========== 近似重复聚类（MinHash + LSH 分段） ==========
+# 单次哈希 MinHash：特征哈希按低位分到 32 个桶，各桶取最小值；8 段 × 4 行分桶，
+# Jaccard≈0.7 时成为候选的概率约 0.9，≈0.2 时约 1%
+MINHASH_PERMS, MINHASH_BANDS = 32, 8
+
+def minhash(text):
+    """标题 + 描述的 MinHash 签名（单词与相邻词对作为特征）；分词过少时返回 None"""
+    toks = tokenize(text)
+    if len(toks) < NEAR_DUP_MIN_TOKENS: return None
+    feats = set(toks) | {a + " " + b for a, b in zip(toks, toks[1:])}
+    k = MINHASH_PERMS
+    bins = [None] * k
+    for f in feats:
+        h = zlib.crc32(f.encode("utf-8"))
+        b, v = h % k, h // k
+        if bins[b] is None or v < bins[b]: bins[b] = v
+    # 空桶借用右侧最近的非空桶并记下距离（旋转致密化），保证各位置可比
+    sig = []
+    for b in range(k):
+        d = 0
+        while bins[(b + d) % k] is None: d += 1
+        sig.append(bins[(b + d) % k] * k + d)
+    return tuple(sig)
 
+def cluster_near_duplicates(stream):
+    """把不同来源的同一职位合并为一条：逐条计算签名并插入 LSH 分段桶，只比较同桶候选，整体近似线性。
+    每簇保留描述最完整的一条（位置取簇内最早出现者），并在 links 中记录所有来源链接。"""
+    items, parent = [], []
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]; i = parent[i]
+        return i
+    unis = {}
+    def distinct_unis(i, j):
+        # 模板化招聘文本很像，但识别出的大学不同时一定不是同一职位
+        for x in (i, j):
+            if x not in unis:
+                unis[x] = hit_terms(MATCHER.scan(items[x].get("title","") + " " + items[x].get("description","")), "university")
+        return unis[i] and unis[j] and not (unis[i] & unis[j])
+    sigs, buckets = [], {}
+    rows = MINHASH_PERMS // MINHASH_BANDS
+    need = NEAR_DUP_THRESHOLD * MINHASH_PERMS
+    for i, it in enumerate(stream):
+        items.append(it); parent.append(i)
+        sig = minhash(it.get("title","") + " " + it.get("description",""))
+        sigs.append(sig)
+        if sig is None: continue
+        for b in range(MINHASH_BANDS):
+            key = (b,) + sig[b*rows:(b+1)*rows]
+            bucket = buckets.setdefault(key, [])
+            if len(bucket) >= NEAR_DUP_MAX_BUCKET: continue
+            for j in bucket:
+                if find(i) != find(j) and sum(map(operator.eq, sig, sigs[j])) >= need \
+                        and not distinct_unis(i, j):
+                    parent[find(i)] = find(j)
+            bucket.append(i)
+
+    clusters = {}
+    for i in range(len(items)):
+        clusters.setdefault(find(i), []).append(i)
+    out = []
+    for members in sorted(clusters.values(), key=lambda m: m[0]):
+        if len(members) == 1:
+            out.append(items[members[0]]); continue
+        best = max(members, key=lambda i: (len(items[i].get("description","")), -i))
+        canon = items[best].copy()
+        canon["links"] = [{"source": items[i].get("source",""), "link": items[i].get("link","")} for i in members]
+        out.append(canon)
     return out
 
-# ========== 主流程 ==========
-def main():
-    items = gather_sources()
+# ========== 本地条目库（SQLite） ==========
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items(
+    id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    source TEXT,
+    funded INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 0,
+    run_seq INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    deadline TEXT NOT NULL DEFAULT '',
+    archived TEXT NOT NULL DEFAULT '',
+    feed TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_items_last_seen ON items(last_seen, funded, score, run_seq);
+CREATE INDEX IF NOT EXISTS idx_items_source ON items(source, last_seen);
+-- 各来源最近一次刷新时间：输出取每个来源在其最近一次刷新中出现的条目（部分刷新时其余来源沿用库中结果）
+CREATE TABLE IF NOT EXISTS sources(
+    source TEXT PRIMARY KEY,
+    last_run TEXT NOT NULL
+);
+"""
+RUN_FLAGS = ("is_new", "is_updated")   # 每轮输出时计算，不入库
+PASS_THROUGH = ("links", "feed")      # 每轮由聚类 / 抓取重新生成，不参与内容哈希
+
+def content_hash(it):
+    """原始字段 + ENRICH_VERSION 的哈希；未变化则直接复用库中的增强结果"""
+    key = [ENRICH_VERSION] + [it.get(k) for k in ("title","link","description","source","social")]
+    return md5(json.dumps(key, ensure_ascii=False))
+
+def _store_row(it, h, first_seen, last_seen, updated_at, seq, archived=""):
+    return (it["id"], h, first_seen, last_seen, updated_at, it.get("source",""),
+            1 if is_funded_label(it.get("funding")) else 0, int(it.get("score") or 0), seq,
+            json.dumps(it.to_dict(), ensure_ascii=False), normalize_deadline(it.get("deadline")), archived,
+            it.get("feed",""))
+
+def open_store(path=None, readonly=False):
+    """打开条目库（建表 / 补列 / 首次由 latest.json 建库）；readonly 时只读打开、不做任何写入，库不存在返回 None"""
+    path = path or STORE_PATH
+    if readonly:
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True) if os.path.exists(path) else None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    con = sqlite3.connect(path)
+    con.executescript(STORE_SCHEMA)
+    cols = {r[1] for r in con.execute("PRAGMA table_info(items)")}
+    with con:
+        # 旧库补列：规范化截止日期（由库中数据回填）、归档月份与所属 feed
+        for col in ("deadline", "archived", "feed"):
+            if col not in cols: con.execute(f"ALTER TABLE items ADD COLUMN {col} TEXT NOT NULL DEFAULT ''")
+        if "deadline" not in cols:
+            con.executemany("UPDATE items SET deadline=? WHERE id=?",
+                            [(normalize_deadline(json.loads(d).get("deadline")), i)
+                             for i, d in con.execute("SELECT id, data FROM items")])
+    if con.execute("SELECT 1 FROM items LIMIT 1").fetchone() is None:
+        _bootstrap_store(con)
+    if con.execute("SELECT 1 FROM sources LIMIT 1").fetchone() is None:
+        # 旧库没有 sources 表：以最近一轮全量运行出现过的来源为准
+        with con:
+            con.execute("INSERT INTO sources SELECT source, last_seen FROM items "
+                        "WHERE last_seen = (SELECT MAX(last_seen) FROM items) GROUP BY source")
+    return con
+
+def _bootstrap_store(con, latest_path=LATEST_PATH):
+    """库为空（首次运行或缓存丢失）时用上一轮 latest.json 建库，避免全部条目被标成新增"""
+    prev = _read_json(latest_path)
+    if prev is None: return
+    ts = prev.get("generated_at") or now_iso()
+    rows = []
+    for seq, p in enumerate(prev.get("items", [])):
+        p = Item.from_dict(p)
+        if not p.get("id"): p["id"] = md5(p.get("link",""))
+        # 保留上一轮的新增/更新标记；更早的首次出现/更新时间未知，记为空
+        first = ts if p.get("is_new") else ""
+        upd = ts if p.get("is_new") or p.get("is_updated") else ""
+        rows.append(_store_row(p, content_hash(p), first, ts, upd, seq))
+    with con:
+        con.executemany("INSERT OR IGNORE INTO items VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+
+def store_sync(con, items, run_at):
+    """逐条写入本轮条目（主键查找判断新增/变更）：内容哈希未变的复用库中结果，其余才增强。
+    按窗口批量调用 enrich_items，以便开启多进程时分块并行，窗口外不多占内存。"""
+    later, enrich_s = [], 0.0
+    window = EXTRACT_CHUNK * max(1, EXTRACT_WORKERS)
+    def rows():
+        seq, batch = 0, []
+        for it in items:
+            batch.append(it)
+            if len(batch) >= window:
+                yield from flush(batch, seq); seq += len(batch); batch = []
+        yield from flush(batch, seq)
+    def flush(batch, seq):
+        nonlocal enrich_s
+        plan = []
+        for it in batch:
+            h = content_hash(it)
+            row = con.execute("SELECT content_hash, first_seen, updated_at, data, archived FROM items WHERE id=?",
+                              (it["id"],)).fetchone()
+            plan.append((it, h, row, row is not None and row[0] == h))
+        t = time.perf_counter()
+        fresh = iter(enrich_items([it for it, _, _, same in plan if not same]))
+        enrich_s += time.perf_counter() - t
+        for seq, (it, h, row, same) in enumerate(plan, start=seq):
+            if same:
+                e, first, upd, arch = Item.from_dict(json.loads(row[3])), row[1], row[2], row[4]
+                for k in PASS_THROUGH:
+                    if k in it: e[k] = it[k]
+                    elif k in e: del e[k]
+            else:
+                # 内容变化的条目即使已归档也重新归档（归档月份清空）
+                e, first, upd, arch = next(fresh), (row[1] if row else run_at), run_at, ""
+            # 只有链接文字的条目待详情页补全；代表论文只补查还没有结果的条目（查询结果本身有持久缓存）
+            if not e.get("description") and not e.get("social") or e.get("university") and not e.get("papers"):
+                later.append([e, h, first, upd, seq, arch])
+            yield _store_row(e, h, first, run_at, upd, seq, arch)
+    with con:
+        con.executemany("INSERT OR REPLACE INTO items VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows())
+    metric_add_stage("enrich", enrich_s)
+    # 详情页补全在论文补查之前：补全后识别出的大学可能变化。补全结果随原始字段的内容哈希入库，下轮直接复用
+    detailed = enrich_details([x[0] for x in later if not x[0].get("description") and not x[0].get("social")])
+    for x in later: x[0] = detailed.get(x[0]["id"], x[0])
+    enrich_papers([e for e, *_ in later if e.get("university") and not e.get("papers")])
+    with con:
+        con.executemany("INSERT OR REPLACE INTO items VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        [_store_row(e, h, first, run_at, upd, seq, arch)
+                         for e, h, first, upd, seq, arch in later if e["papers"] or e["id"] in detailed])
+
+def store_mark_sources(con, tags, run_at, known=None):
+    """记录本轮刷新过的来源；给出 known（全量运行时的全部来源）时删除已不在数据源列表中的来源"""
+    with con:
+        con.executemany("INSERT OR REPLACE INTO sources VALUES (?,?)", [(t, run_at) for t in tags])
+        if known is not None:
+            known = list(known)
+            con.execute("DELETE FROM sources WHERE source NOT IN (%s)" % ",".join("?" * len(known)), known)
+
+def store_touch_sources(con, tags, run_at):
+    """内容未变的来源（常驻轮询）：只把其当前条目的最近出现时间推进到本轮，免得被当成久未出现而归档"""
+    with con:
+        con.executemany("UPDATE items SET last_seen=? WHERE source=? AND last_seen=(SELECT last_run FROM sources WHERE source=?)",
+                        [(run_at, t, t) for t in tags])
+    store_mark_sources(con, tags, run_at)
+
+def store_keep_feeds(con, missed, run_at):
+    """来源已刷新但其中个别 feed 失败 / 超时：这些 feed 上一轮的当前条目照常保留（推进最近出现时间），
+    需在 store_sync 与 store_mark_sources 之前调用。missed 为 {来源: [feed URL]}；旧库中未记录 feed 的条目一并保留"""
+    with con:
+        con.executemany("UPDATE items SET last_seen=? WHERE source=? AND feed IN (?, '') "
+                        "AND last_seen=(SELECT last_run FROM sources WHERE source=?)",
+                        [(run_at, t, u, t) for t, urls in missed.items() for u in urls])
+
+def _current_item(data, first_seen, updated_at, last_run):
+    it = Item.from_dict(json.loads(data))
+    it["is_new"] = first_seen == last_run
+    it["is_updated"] = not it["is_new"] and updated_at == last_run
+    return it
+
+# 当前条目：每个来源在其最近一次刷新中出现的条目（新增/更新标记也相对于该来源的最近一次刷新）
+_CURRENT = ("FROM items i JOIN sources s ON i.source = s.source AND i.last_seen = s.last_run "
+            "ORDER BY i.funded DESC, i.score DESC, i.last_seen DESC, i.run_seq")
+# 热输出：当前条目中截止日期未过、且近 ARCHIVE_UNSEEN_DAYS 天内出现过的（来源长期抓取失败时其条目也会退出）
+_HOT = _CURRENT.replace(" ORDER BY", " WHERE (i.deadline = '' OR i.deadline >= ?) AND i.last_seen >= ? ORDER BY")
 
-    # 只保留健康/HCI相关
-    filtered=[]
+def _hot_bounds(run_at=None):
+    """(今天 YYYY-MM-DD, 未再出现的截止时间点)"""
+    at = datetime.fromisoformat(run_at or now_iso())
+    return at.date().isoformat(), (at - timedelta(days=ARCHIVE_UNSEEN_DAYS)).isoformat()
+
+def store_current(con, run_at=None):
+    """热输出条目：资助优先 + 分数降序，同分保持抓取顺序；附带新增/更新标记（游标逐条读取）"""
+    for row in con.execute("SELECT i.data, i.first_seen, i.updated_at, s.last_run " + _HOT, _hot_bounds(run_at)):
+        yield _current_item(*row)
+
+def store_order(con, run_at=None):
+    """只读排序所需的轻量列：[(id, source, is_new, is_updated)]，与 store_current 顺序一致"""
+    return [(i, src, first == run, first != run and upd == run)
+            for i, src, first, upd, run in con.execute(
+                "SELECT i.id, i.source, i.first_seen, i.updated_at, s.last_run " + _HOT, _hot_bounds(run_at))]
+
+def store_items(con, ids):
+    """按 id 取条目（保持 ids 顺序）"""
+    rows = {}
+    for i in range(0, len(ids), 500):
+        part = ids[i:i+500]
+        for rid, *row in con.execute("SELECT i.id, i.data, i.first_seen, i.updated_at, s.last_run FROM items i "
+                                     "JOIN sources s ON i.source = s.source WHERE i.id IN (%s)"
+                                     % ",".join("?" * len(part)), part):
+            rows[rid] = _current_item(*row)
+    return [rows[i] for i in ids if i in rows]
+
+def store_linked_ids(con, exclude_sources):
+    """其余来源的当前条目已合并的链接 id（近似重复簇的 links）；部分刷新时据此跳过已被合并的条目"""
+    ids = set()
+    for data, src in con.execute("SELECT i.data, i.source " + _CURRENT):
+        if src in exclude_sources: continue
+        for l in json.loads(data).get("links") or ():
+            ids.add(md5(l.get("link")))
+    return ids
+
+def store_diff(con, items):
+    """试运行用：按来源统计本轮条目相对库中的 新增 / 变更 / 未变 数量，不写库；没有库（con 为 None）时全部为新增"""
+    out = {}
     for it in items:
-        text = (it.get("title","") + " " + it.get("description","")).lower()
-        if any(k in text for k in ["health","medical","clinic","hci","human-computer","ux","assistive","human-centered","digital"]):
-            filtered.append(it)
+        row = con.execute("SELECT content_hash FROM items WHERE id=?", (it["id"],)).fetchone() if con else None
+        k = "new" if row is None else "unchanged" if row[0] == content_hash(it) else "updated"
+        st = out.setdefault(it.get("source",""), {"new": 0, "updated": 0, "unchanged": 0})
+        st[k] += 1
+    return out
 
-    # 去重（按链接或标题）
-    uniq, seen = [], set()
-    for it in filtered:
-        key = md5(it.get("link") or it.get("title"))
-        if key in seen: continue
-        seen.add(key)
-        uniq.append(it)
+# ========== 归档（按月分片 + 索引） ==========
+def load_archive_index():
+    return _read_json(ARCHIVE_INDEX_PATH) or {"schema": 1, "months": {}, "ids": {}}
+
+def archive_items(con, run_at):
+    """把截止日期已过、或久未出现的条目移出热输出：按月（过期按截止月份，否则按最后出现月份）合并写入
+    archive/YYYY-MM.json，索引记录每月文件与 id -> 月份；久未出现的条目归档后从库中删除。返回 (归档数, 删除数)"""
+    today, cutoff = _hot_bounds(run_at)
+    months = {}
+    for rid, data, first, last, dl in con.execute(
+            "SELECT id, data, first_seen, last_seen, deadline FROM items WHERE archived = '' "
+            "AND ((deadline != '' AND deadline < ?) OR last_seen < ?)", (today, cutoff)):
+        month = (dl if dl and dl < today else last)[:7]
+        months.setdefault(month, {})[rid] = Item.from_dict(json.loads(data)).to_json(first_seen=first, last_seen=last)
+    index = load_archive_index()
+    for month, items in sorted(months.items()):
+        path = os.path.join(ARCHIVE_DIR, f"{month}.json")
+        old = {x["id"]: x for x in (_read_json(path) or {}).get("items", [])}
+        old.update(items)
+        raw = _compact({"month": month, "count": len(old), "items": list(old.values())})
+        write_compressed(path, raw)
+        index["months"][month] = {"path": f"archive/{month}.json", "count": len(old), "bytes": len(raw)}
+        index["ids"].update(dict.fromkeys(items, month))
+    with con:
+        con.executemany("UPDATE items SET archived=? WHERE id=?",
+                        [(month, rid) for month, items in months.items() for rid in items])
+        dropped = con.execute("DELETE FROM items WHERE last_seen < ?", (cutoff,)).rowcount
+    if months:
+        index["generated_at"] = run_at
+        index["months"] = dict(sorted(index["months"].items()))
+        write_compressed(ARCHIVE_INDEX_PATH, _compact(index))
+    return sum(len(x) for x in months.values()), dropped
 
-    # 读取上一轮，做“新增/更新”标记
-    latest_path = os.path.join("public","data","latest.json")
-    prev_ids=set()
-    if os.path.exists(latest_path):
+# ========== 输出（latest.json / 分片 + manifest） ==========
+def write_compressed(path, raw):
+    """写文件及其 .gz/.br 副本；内容未变则不重写（避免无意义的提交）"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    variants = [(path, raw), (path + ".gz", gzip.compress(raw, 9, mtime=0))]
+    if brotli is not None: variants.append((path + ".br", brotli.compress(raw)))
+    for p, b in variants:
         try:
-            prev = json.load(open(latest_path,"r",encoding="utf-8"))
-            for p in prev.get("items",[]):
-                prev_ids.add(p.get("id") or md5(p.get("link","")))
-        except Exception:
+            with open(p, "rb") as f:
+                if f.read() == b: continue
+        except OSError:
             pass
-    for it in uniq:
-        it["is_new"] = (it.get("id") not in prev_ids)
+        with open(p, "wb") as f: f.write(b)
+
+def _compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+
+def _slug(s):
+    return re.sub(r"[^a-z0-9]+", "-", (s or "").lower()).strip("-") or "source"
 
-    # 排序（资助优先 + 分数）
-    def funded_rank(x):
-        f = (x.get("funding") or "").lower()
-        return 1 if any(w in f for w in ["funded","stipend","studentship","scholarship","full"]) else 0
-    uniq_sorted = sorted(uniq, key=lambda x:(funded_rank(x), x.get("score",0)), reverse=True)
+class LatestWriter:
+    """逐条写 latest.json：输出与 json.dump(data, indent=2) 逐字节一致，items 不整体驻留内存"""
+    def __init__(self, path, head):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path, self.n = path, 0
+        self.f = open(path + ".tmp", "w", encoding="utf-8")
+        self.f.write(json.dumps(dict(head, items=[]), ensure_ascii=False, indent=2)[:-len('[]\n}')] + "[")
 
-    # Top10（优先新增）
-    top_new = [x for x in uniq_sorted if x.get("is_new")] or uniq_sorted
-    top10 = top_new[:10]
+    def add(self, it):
+        self.f.write(("," if self.n else "") + "\n    " +
+                     json.dumps(it.to_json(), ensure_ascii=False, indent=2).replace("\n", "\n    "))
+        self.n += 1
+
+    def close(self):
+        self.f.write("\n  ]\n}" if self.n else "]\n}")
+        self.f.close()
+        os.replace(self.path + ".tmp", self.path)
+
+class ShardWriter:
+    """manifest + 分片：Top10 单独成片（首屏只需 manifest 与这一片），其余按来源、条数与大小切片。
+    每条只出现一次，带 rank 字段供前端合并后恢复全局顺序；每个来源只缓存未写满的一片。"""
+    def __init__(self, top_ids, meta):
+        self.top_ids, self.meta, self.rank = top_ids, meta, 0
+        self.open = {"top": ([], [0])}     # 分组 -> (当前片, [当前字节数])
+        self.order, self.seq, self.shards = {"top": 0}, {}, []
+
+    def add(self, it):
+        key = "top" if it["id"] in self.top_ids else it.get("source","")
+        it = it.to_json(rank=self.rank); self.rank += 1
+        self.order.setdefault(key, len(self.order))
+        chunk, size = self.open.setdefault(key, ([], [0]))
+        n = len(_compact(it))
+        if chunk and (len(chunk) >= SHARD_MAX_ITEMS or size[0] + n > SHARD_MAX_BYTES):
+            self._flush(key)
+            chunk, size = self.open[key]
+        chunk.append(it); size[0] += n
+
+    def _flush(self, key):
+        chunk, _ = self.open.pop(key)
+        self.open[key] = ([], [0])
+        name = "top" if key == "top" else _slug(key)
+        n = 0
+        if key != "top":
+            n = self.seq[name] = self.seq.get(name, -1) + 1
+            name = f"{name}-{n}"
+        raw, path = _compact({"source": key, "items": chunk}), f"shards/{name}.json"
+        write_compressed(os.path.join(DATA_DIR, path), raw)
+        ids = [x["id"] for x in chunk if x["id"] in self.top_ids]
+        self.shards.append(((self.order[key], n), ids, {"path": path, "source": key, "count": len(chunk),
+                            "bytes": len(raw), "hash": hashlib.md5(raw).hexdigest()[:12]}))
+
+    def close(self):
+        for key in list(self.open):
+            if self.open[key][0] or key == "top": self._flush(key)
+        # 按分组首次出现的顺序排列分片（与逐组切片时一致）
+        self.shards.sort(key=lambda x: x[0])
+        top_shard = {i: k for k, (_, ids, _) in enumerate(self.shards) for i in ids}
+        shards = [x[2] for x in self.shards]
+
+        # 清理上一轮遗留、本轮不再使用的分片
+        keep = {os.path.basename(x["path"]) for x in shards}
+        if os.path.isdir(SHARD_DIR):
+            for name in os.listdir(SHARD_DIR):
+                if name.split(".json")[0] + ".json" not in keep:
+                    os.remove(os.path.join(SHARD_DIR, name))
+
+        manifest = dict(self.meta, schema=1, top10=[{"id": i, "shard": top_shard[i]} for i in self.top_ids],
+                        shards=shards)
+        write_compressed(MANIFEST_PATH, _compact(manifest))
+        return manifest
+
+def _gaps(xs):
+    """升序序号差分编码，压缩 posting list"""
+    out, prev = [], 0
+    for x in xs:
+        out.append(x - prev); prev = x
+    return out
+
+class SearchIndexWriter:
+    """倒排索引：title / description / keywords 的词 -> 条目序号（即 rank，与 latest.json 的 items 下标一致）。
+    另附来源、资助类别、新增/更新、地区、分数档、来源类型的分面，前端求交集即可完成筛选。"""
+    _REGIONS = {r.lower(): r for r in REGION_PREFER}   # 地区名均为单词，按词匹配（避免 "uk" 命中 "ukraine"）
+
+    def __init__(self, run_at=None):
+        self.run_at, self.n = run_at, 0
+        self.postings, self.facets = {}, {k: {} for k in ("source", "funding", "status", "region", "score", "type")}
+
+    def _facet(self, name, value):
+        self.facets[name].setdefault(value, array("l")).append(self.n)
+
+    def add(self, it):
+        toks = set(tokenize(f"{it.get('title','')} {it.get('description','')} {' '.join(it.get('keywords') or [])}"))
+        for t in toks:
+            self.postings.setdefault(t, array("l")).append(self.n)
+        self._facet("source", it.get("source",""))
+        funding = it.get("funding") or ""
+        self._facet("funding", "self_funded" if scan_field(funding).get("self_funded")
+                    else "funded" if is_funded_label(funding) else "unknown")
+        if it.get("is_new"): self._facet("status", "new")
+        elif it.get("is_updated"): self._facet("status", "updated")
+        regions = {self._REGIONS[t] for t in toks | set(tokenize(it.get("location"))) if t in self._REGIONS}
+        for r in regions or ("Other",): self._facet("region", r)
+        self._facet("score", str(int(it.get("score") or 0) // SCORE_BUCKET * SCORE_BUCKET))
+        self._facet("type", "social" if it.get("social") else "academic")
+        self.n += 1
+
+    def close(self):
+        terms = sorted(self.postings)
+        data = {"generated_at": self.run_at or now_iso(), "schema": 1, "count": self.n,
+                "score_bucket": SCORE_BUCKET, "terms": terms,
+                "postings": [_gaps(self.postings[t]) for t in terms],
+                "facets": {k: {v: _gaps(xs) for v, xs in f.items()} for k, f in self.facets.items()}}
+        raw = _compact(data)
+        write_compressed(SEARCH_INDEX_PATH, raw)
+        return {"terms": len(terms), "bytes": len(raw)}
+
+# ========== 主流程 ==========
+def is_relevant(it):
+    """只保留健康/HCI相关"""
+    return bool(MATCHER.scan(it.get("title","") + " " + it.get("description","")).get("topic"))
+
+def dedupe(items):
+    """去重（按链接或标题），逐条产出"""
+    seen = set()
+    for it in items:
+        key = md5(it.get("link") or it.get("title"))
+        if key in seen: continue
+        seen.add(key)
+        yield it
+
+def write_outputs(con, run_at):
+    """从库中按序逐条读取本轮条目，生成 Top10 / CSV / 来源统计，并按 OUTPUT_MODE 流式写出；返回统计"""
+    with metric_stage("sort"):
+        order = store_order(con, run_at)
+    # Top10（优先新增/更新）：order 已按资助 + 分数排好，取前 10 个即可
+    top_ids = [i for i, _, new, upd in order if new or upd][:10] or [i for i, *_ in order[:10]]
+    top10 = store_items(con, top_ids)
 
     # CSV
     csv_rows = [["University","Lab/School","Supervisor(s)","Topic keywords","Location","Funding/Stipend","Eligibility (International OK?)","Deadline","Link","Source"]]
-    def row(x):
-        return [
-            x.get("university",""),
-            x.get("lab",""),
-            x.get("supervisor",""),
-            ", ".join(x.get("keywords",[])[:8]),
-            x.get("location",""),
-            x.get("funding",""),
-            x.get("eligibility",""),
-            x.get("deadline",""),
-            x.get("link",""),
-            x.get("source",""),
-        ]
-    for r in top10: csv_rows.append(row(r))
+    for r in top10: csv_rows.append(r.csv_row())
     csv_text = "\n".join([",".join(['"'+c.replace('"','""')+'"' for c in row]) for row in csv_rows])
 
     # 统计来源
     by = {}
-    for it in uniq_sorted:
-        by[it["source"]] = by.get(it["source"],0)+1
+    for _, src, *_ in order:
+        by[src] = by.get(src,0)+1
 
-    data = {
-        "generated_at": now_iso(),
-        "total_items": len(uniq_sorted),
+    meta = {
+        "generated_at": run_at,
+        "total_items": len(order),
         "by_source": by,
-        "top10_new_or_updated": top10,
         "csv_block": csv_text,
-        "items": uniq_sorted
     }
+    writers = []
+    if OUTPUT_MODE in ("single", "both"):
+        writers.append(LatestWriter(LATEST_PATH, {
+            "generated_at": run_at,
+            "total_items": len(order),
+            "by_source": by,
+            "top10_new_or_updated": [x.to_json() for x in top10],
+            "csv_block": csv_text,
+        }))
+    if OUTPUT_MODE in ("sharded", "both"):
+        writers.append(ShardWriter(top_ids, meta))
+    writers.append(SearchIndexWriter(run_at))
+    ranker = ProfileRanker(run_at=run_at)
+    for it in store_current(con, run_at):
+        for w in writers: w.add(it)
+        ranker.add(it)
+    for w in writers:
+        out = w.close()
+        if isinstance(w, ShardWriter): print(f"[fetch_all] wrote {MANIFEST_PATH} shards: {len(out['shards'])}")
+        if isinstance(w, SearchIndexWriter):
+            print(f"[fetch_all] wrote {SEARCH_INDEX_PATH} terms: {out['terms']}, {out['bytes']/1024:.0f} KB")
+    with metric_stage("rank"):
+        ranked = ranker.close()
+    print(f"[fetch_all] wrote {RANKINGS_PATH} profiles: " + ", ".join(
+        f"{p} top {len(r['top'])}" for p, r in ranked["profiles"].items()))
+    return {"by_source": by, "total": len(order),
+            "new": sum(1 for x in order if x[2]), "updated": sum(1 for x in order if x[3])}
+
+def select_sources(specs, names=None, exclude=None):
+    """按来源标签（不区分大小写，空格可写作 -）筛选数据源；social / academic 表示整类"""
+    def hit(spec, name):
+        name = name.lower().replace("-", " ")
+        if name in ("social", "academic"): return bool(spec[3].get("social")) == (name == "social")
+        return spec[2].lower().replace("-", " ") == name
+    names = [n for x in (names or []) for n in x.split(",") if n]
+    exclude = [n for x in (exclude or []) for n in x.split(",") if n]
+    unknown = [n for n in names + exclude if not any(hit(s, n) for s in specs)]
+    if unknown: raise ValueError(f"unknown source(s): {', '.join(unknown)}")
+    return [s for s in specs if (not names or any(hit(s, n) for n in names))
+            and not any(hit(s, n) for n in exclude)]
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Collect Health-HCI PhD postings into public/data")
+    ap.add_argument("--sources", nargs="+", metavar="TAG",
+                    help="refresh only these sources (tags as in --list, or social / academic); "
+                         "stored items of the other sources are kept without refetching")
+    ap.add_argument("--exclude", nargs="+", metavar="TAG", help="skip these sources")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="fetch and compare with the store, but write nothing to the store or public/data")
+    ap.add_argument("--list", action="store_true", help="list source tags with their last refresh and exit")
+    ap.add_argument("--daemon", action="store_true",
+                    help="keep running and poll each source on its own adaptive interval (state in .cache/schedule.json)")
+    ap.add_argument("--max-cycles", type=int, help="with --daemon: stop after this many polling cycles")
+    return ap, ap.parse_args(argv)
+
+def list_sources():
+    """列出数据源与库中的当前条目数；只读打开库，库不存在（或是还没有 sources 表的旧库）时条目数记为 0"""
+    runs, counts = {}, {}
+    con = open_store(readonly=True)
+    if con is not None:
+        try:
+            runs = dict(con.execute("SELECT source, last_run FROM sources"))
+            counts = dict(con.execute("SELECT i.source, COUNT(*) FROM items i JOIN sources s "
+                                      "ON i.source = s.source AND i.last_seen = s.last_run GROUP BY i.source"))
+        except sqlite3.OperationalError:   # 旧库还没有 sources 表
+            pass
+        finally:
+            con.close()
+    tags = {}
+    for fn, url, tag, kw in build_sources():
+        tags.setdefault(tag, [0, "social" if kw.get("social") else "academic"])[0] += 1
+    for tag, (n, kind) in tags.items():
+        print(f"  {tag:22s} {kind:8s} {n:2d} feed(s)  items {counts.get(tag, 0):5d}  last refresh {runs.get(tag, '—')}")
 
-    os.makedirs(os.path.dirname(latest_path), exist_ok=True)
-    with open(latest_path,"w",encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def begin_run():
+    """每轮开始：清空指标与上一轮遗留的 Semantic Scholar 限流标记"""
+    reset_metrics()
+    _sem_throttled.clear()
+
+def source_refreshed(tag):
+    """本轮该来源至少有一条 feed 确实拿到了内容（200/304 或缓存命中）且没有超出抓取预算；
+    全部失败（请求失败 / 熔断 / 超时）不算刷新，库中该来源上一轮的条目继续输出，直到久未出现而归档"""
+    return any(t == tag and st == "ok" for t, st in METRICS["feeds"].values())
+
+def missed_feeds(tags):
+    """已刷新来源中本轮失败 / 超时的 feed：{来源: [URL]}"""
+    out = {}
+    for url, (t, st) in METRICS["feeds"].items():
+        if t in tags and st != "ok": out.setdefault(t, []).append(url)
+    return out
+
+def publish(canon, tags, run_at, t0, known=None):
+    """只把确实刷新成功的来源入库（新增/变更才增强）并由库中当前条目重写输出；其余来源的条目、排名与
+    by_source 直接由库中结果重新计算。known 为全量运行时的全部来源（删除已移除的来源）。返回 (stats, 本轮指标)"""
+    ok = [t for t in tags if source_refreshed(t)]
+    if len(ok) < len(tags): print(f"[fetch_all] not refreshed, keeping stored items: {', '.join(t for t in tags if t not in ok)}")
+    partial = known is None or set(ok) != set(known)
+    missed = missed_feeds(set(ok))
+    for t, urls in missed.items(): print(f"[fetch_all] {t}: {len(urls)} feed(s) not refreshed, keeping their stored items")
+    canon = [x for x in canon if x["source"] in ok]
+    con = open_store()
+    try:
+        if partial:
+            # 未刷新来源的条目不参与本轮聚类；已被它们合并过的同一职位不再单独出现
+            linked = store_linked_ids(con, set(ok))
+            canon = [x for x in canon if x["id"] not in linked]
+        with metric_stage("store"):
+            store_keep_feeds(con, missed, run_at)
+            store_sync(con, canon, run_at)
+            store_mark_sources(con, ok, run_at, known)
+        del canon
+        with metric_stage("archive"):
+            archived, dropped = archive_items(con, run_at)
+        if archived or dropped: print(f"[fetch_all] archived {archived} expired/unseen postings, dropped {dropped} from the store")
+        with metric_stage("write"):
+            stats = write_outputs(con, run_at)
+    finally:
+        con.close()
+    shutdown_extract_pool()
+    cache_prune()
+    run = write_metrics(run_at, time.perf_counter() - t0, stats["by_source"], refreshed=ok if partial else None)
+    return stats, run
+
+def print_run(stats, run):
+    print(f"[fetch_all] wrote {DATA_DIR} items: {stats['total']}; new: {stats['new']}; updated: {stats['updated']}; "
+          f"{run['total_s']:.1f}s, peak RSS {run['peak_rss_mb']} MB")
+    print("  source                 : kept/parsed  req  KB     status         cache h/m/e  wall s")
+    for k,v in sorted(run["sources"].items(), key=lambda x:-x[1].get("kept",0)):
+        codes = ",".join(f"{c}x{n}" for c, n in sorted(v.get("status",{}).items()))
+        if v.get("breaker_skipped"): codes = f"open x{v['breaker_skipped']}"
+        print(f"  - {k:22s}: {v.get('kept',0):4d}/{v.get('parsed',0):<6d} {v.get('requests',0):3d} "
+              f"{v.get('bytes',0)/1024:6.0f} {codes:14s} {v.get('cache_hit',0)}/{v.get('cache_miss',0)}/{v.get('cache_error',0):<8d} "
+              f"{v.get('wall_s',0):6.2f}")
+    print("  stages: " + ", ".join(f"{k} {v:.2f}s" for k, v in run["stages"].items()))
+    for k, v in run["apis"].items():
+        print(f"  api {k}: {v['calls']} calls, {v['errors']} errors, p50 {v['p50_s']}s, p95 {v['p95_s']}s")
+
+# ========== 常驻轮询（--daemon） ==========
+def load_schedule():
+    return _read_json(SCHEDULE_PATH, {})
+
+def save_schedule(state):
+    _write_json_atomic(SCHEDULE_PATH, state, indent=1)
+
+def _clamp_interval(x):
+    return max(DAEMON_MIN_INTERVAL, min(DAEMON_MAX_INTERVAL, x))
+
+def learned_intervals(con, days=30):
+    """由库中历史估计各来源的初始轮询间隔：近 days 天内有内容变化（updated_at）的轮次视为一次变化，
+    间隔取平均变化间隔的一半；没有历史的来源社交源按 1 小时、学术站按 12 小时起步"""
+    since = datetime.fromtimestamp(time.time() - days*86400, timezone.utc).isoformat()
+    out = {}
+    for src, n, first in con.execute("SELECT source, COUNT(DISTINCT updated_at), MIN(updated_at) FROM items "
+                                     "WHERE updated_at >= ? GROUP BY source", (since,)):
+        span = time.time() - datetime.fromisoformat(first).timestamp()
+        if n > 1: out[src] = _clamp_interval(span / (n - 1) / 2)
+    return out
+
+def next_interval(st):
+    """最近 DAEMON_POLL_HISTORY 次轮询里有变化：间隔取平均变化间隔的一半；一直没变化则逐步放宽 1.5 倍"""
+    polls = st["polls"]
+    changes = sum(1 for _, changed in polls if changed)
+    if changes and len(polls) > 1:
+        return _clamp_interval((polls[-1][0] - polls[0][0]) / changes / 2)
+    return _clamp_interval(st["interval"] * 1.5)
+
+def _digest(items):
+    """来源内容指纹：各条目内容哈希排序后再哈希，条目增删或内容变化都会改变"""
+    return md5(" ".join(sorted(content_hash(it) for it in items)))
+
+def first_poll_changed(con, items):
+    """来源的首次轮询（还没有内容指纹）：与库比较，有新增或内容变化的条目才需要发布；
+    库里没有、但已作为其他条目的 links 合并过的条目不算新增"""
+    linked = None
+    for it in items:
+        row = con.execute("SELECT content_hash FROM items WHERE id=?", (it["id"],)).fetchone()
+        if row is not None:
+            if row[0] != content_hash(it): return True
+            continue
+        if linked is None: linked = store_linked_ids(con, set())
+        if it["id"] not in linked: return True
+    return False
+
+def daemon(specs, max_cycles=None):
+    """常驻轮询：每轮只抓到期的来源；内容指纹没变就只更新调度与最近出现时间，变了才做部分刷新并增量重写输出"""
+    state, tags = load_schedule(), list(dict.fromkeys(s[2] for s in specs))
+    con = open_store()
+    try:
+        learned = learned_intervals(con)
+    finally:
+        con.close()
+    social = {s[2] for s in specs if s[3].get("social")}
+    now = time.time()
+    for tag in tags:
+        if tag not in state:
+            iv = learned.get(tag) or _clamp_interval(3600 if tag in social else 12*3600)
+            state[tag] = {"interval": iv, "next_at": now, "digest": None, "polls": []}
+    print(f"[fetch_all] daemon: {len(tags)} sources; " + ", ".join(
+        f"{t} every {state[t]['interval']/3600:.1f}h" for t in tags))
+
+    cycles = 0
+    try:
+        while max_cycles is None or cycles < max_cycles:
+            now = time.time()
+            due = [t for t in tags if state[t]["next_at"] <= now]
+            if not due:
+                time.sleep(max(1.0, min(state[t]["next_at"] for t in tags) - now))
+                continue
+            cycles += 1
+            begin_run()
+            t0, run_at = time.perf_counter(), now_iso()
+            due_specs = [s for s in specs if s[2] in due]
+            fresh = list(metered("dedupe", dedupe,
+                                 metered("fetch", lambda: iter_sources(due_specs, workers=DAEMON_CONCURRENCY))))
+            by_tag = {}
+            for it in fresh: by_tag.setdefault(it["source"], []).append(it)
+            changed, same = [], []
+            con = open_store() if any(state[t]["digest"] is None for t in due) else None
+            missed = missed_feeds(set(due))
+            try:
+                for t in due:
+                    st, d = state[t], _digest(by_tag.get(t, []))
+                    # 抓取失败（熔断 / 超时）不视为变化，避免把已有条目清空
+                    failed = not source_refreshed(t)
+                    first = not failed and st["digest"] is None
+                    if failed: is_change = False
+                    elif first: is_change = first_poll_changed(con, by_tag.get(t, []))
+                    else: is_change = d != st["digest"]
+                    # 个别 feed 失败时指纹不完整，保留上次的指纹（入库时这些 feed 的条目照常保留）
+                    if not failed and t not in missed: st["digest"] = d
+                    if is_change: changed.append(t)
+                    elif not failed: same.append(t)
+                    # 首次轮询只建立指纹，不计入变化历史（否则学到的间隔会被这次“变化”拉短）；
+                    # 失败或个别 feed 失败的轮询也不计入、不调整间隔，重试节奏交给熔断
+                    if not first and not failed and t not in missed:
+                        st["polls"] = (st["polls"] + [[time.time(), is_change]])[-DAEMON_POLL_HISTORY:]
+                        st["interval"] = next_interval(st)
+                    st["next_at"] = time.time() + st["interval"] * random.uniform(1 - DAEMON_JITTER, 1 + DAEMON_JITTER)
+            finally:
+                if con is not None: con.close()
+            if same:
+                con = open_store()
+                try:
+                    store_touch_sources(con, same, run_at)
+                finally:
+                    con.close()
+            if changed:
+                canon = metered("near_dup", cluster_near_duplicates, [it for it in fresh if it["source"] in changed])
+                del fresh
+                stats, run = publish(canon, changed, run_at, t0)
+                print(f"[fetch_all] {run_at} changed: {', '.join(changed)}; "
+                      f"items {stats['total']}, new {stats['new']}, updated {stats['updated']}, {run['total_s']:.1f}s")
+            else:
+                print(f"[fetch_all] {run_at} polled {', '.join(due)}: no changes")
+            save_schedule(state)
+    except KeyboardInterrupt:
+        print("[fetch_all] daemon stopped")
+    finally:
+        save_schedule(state)
+
+def main(argv=None):
+    ap, args = parse_args(argv)
+    if args.list: return list_sources()
+    all_specs = build_sources()
+    try:
+        specs = select_sources(all_specs, args.sources, args.exclude)
+    except ValueError as e:
+        ap.error(f"{e}; see --list")
+    partial = len(specs) < len(all_specs)
+    tags = list(dict.fromkeys(s[2] for s in specs))
+    if partial: print(f"[fetch_all] refreshing {len(specs)}/{len(all_specs)} feeds: {', '.join(tags)}")
+
+    if args.daemon: return daemon(specs, args.max_cycles)
+
+    begin_run()
+    t0, run_at = time.perf_counter(), now_iso()
+    # 流式管线：抓取（抓取线程内先做相关性过滤）→ 去重逐条传递；近似重复聚类需看完全部条目后才产出
+    canon = metered("near_dup", cluster_near_duplicates,
+                    metered("dedupe", dedupe, metered("fetch", lambda: iter_sources(specs))))
+    print(f"[fetch_all] near-duplicates: {sum(len(x.get('links') or [x]) for x in canon)} -> {len(canon)} postings")
+
+    if args.dry_run:
+        con = open_store(readonly=True)
+        try:
+            if partial and con is not None:
+                try:
+                    linked = store_linked_ids(con, set(tags))
+                except sqlite3.OperationalError:   # 旧库还没有 sources 表
+                    linked = set()
+                canon = [x for x in canon if x["id"] not in linked]
+            diff = store_diff(con, canon)
+        finally:
+            if con is not None: con.close()
+        shutdown_extract_pool()
+        print(f"[fetch_all] dry run, nothing written; {time.perf_counter() - t0:.1f}s")
+        for tag in tags:
+            d = diff.get(tag, {})
+            print(f"  - {tag:22s}: new {d.get('new',0):4d}  updated {d.get('updated',0):4d}  unchanged {d.get('unchanged',0):4d}")
+        print("  stages: " + ", ".join(f"{k} {v:.2f}s" for k, v in METRICS["stages"].items()))
+        return
 
-    print(f"[fetch_all] wrote {latest_path} items: {len(uniq_sorted)}; new: {sum(1 for x in uniq_sorted if x.get('is_new'))}")
-    for k,v in sorted(by.items(), key=lambda x:-x[1]):
-        print(f"  - {k:22s}: {v}")
+    print_run(*publish(canon, tags, run_at, t0, None if partial else tags))
 
 if __name__ == "__main__":
     main()
@@ -2,8 +2,115 @@ import React, { useEffect, useMemo, useState } from "react";
 import { createRoot } from "react-dom/client";
 import "./index.css";
 
-// 读取 public/data/latest.json
-const DATA_URL = (import.meta.env.BASE_URL || "/") + "data/latest.json";
+// 优先读取 public/data/manifest.json + 分片；不存在时回退到 latest.json
+const BASE_URL = import.meta.env.BASE_URL || "/";
+const DATA_URL = BASE_URL + "data/latest.json";
+const MANIFEST_URL = BASE_URL + "data/manifest.json";
+const RANKINGS_URL = BASE_URL + "data/rankings.json";
+const SEARCH_INDEX_URL = BASE_URL + "data/search_index.json";
+const EMPTY_DATA = { items: [], by_source: {}, total_items: 0 };
+
+function getJSON(url) {
+  return fetch(url).then((r) => {
+    if (!r.ok) throw new Error(`${r.status} ${url}`);
+    return r.json();
+  });
+}
+
+// 分片合并后按 rank 恢复全局顺序
+function mergeShards(loaded) {
+  return Object.values(loaded)
+    .flat()
+    .sort((a, b) => a.rank - b.rank);
+}
+
+// 先加载 Top10 所在分片完成首屏，再补齐其余分片
+async function loadSharded(onData) {
+  const m = await getJSON(MANIFEST_URL);
+  const shards = m.shards || [];
+  const loaded = {};
+  const loadShard = (i) =>
+    getJSON(`${BASE_URL}data/${shards[i].path}?v=${shards[i].hash}`).then(
+      (js) => (loaded[i] = js.items || [])
+    );
+  const first = [...new Set((m.top10 || []).map((t) => t.shard))];
+  await Promise.all(first.map(loadShard));
+  onData({ ...m, items: mergeShards(loaded) });
+  await Promise.all(shards.map((_, i) => (i in loaded ? null : loadShard(i))));
+  onData({ ...m, items: mergeShards(loaded) });
+}
+
+// ===== 倒排索引查询（search_index.json，序号即条目 rank） =====
+// 与采集端 tokenize 一致：小写后按字母/数字连续段切词
+const tokenize = (s) => (s || "").toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+
+// posting list 为差分编码，首次使用时解码并缓存
+function postings(idx, gaps) {
+  idx._decoded = idx._decoded || new Map();
+  if (!idx._decoded.has(gaps)) {
+    let v = 0;
+    idx._decoded.set(gaps, gaps.map((g) => (v += g)));
+  }
+  return idx._decoded.get(gaps);
+}
+
+function intersect(a, b) {
+  const out = [];
+  for (let i = 0, j = 0; i < a.length && j < b.length; ) {
+    if (a[i] === b[j]) {
+      out.push(a[i]);
+      i++;
+      j++;
+    } else if (a[i] < b[j]) i++;
+    else j++;
+  }
+  return out;
+}
+
+function union(lists) {
+  if (lists.length === 1) return lists[0];
+  return [...new Set(lists.flat())].sort((x, y) => x - y);
+}
+
+// 词前缀匹配（与采集端的子串匹配口径接近，也便于边输入边查）：二分找到前缀区间
+function prefixPostings(idx, tok) {
+  const terms = idx.terms;
+  let lo = 0, hi = terms.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (terms[mid] < tok) lo = mid + 1;
+    else hi = mid;
+  }
+  const lists = [];
+  for (let i = lo; i < terms.length && terms[i].startsWith(tok); i++) {
+    lists.push(postings(idx, idx.postings[i]));
+  }
+  return lists.length ? union(lists) : [];
+}
+
+function facet(idx, name, values) {
+  const f = idx.facets?.[name] || {};
+  return union(values.map((v) => (f[v] ? postings(idx, f[v]) : [])));
+}
+
+// 返回满足条件的 rank 集合；没有任何条件时返回 null
+function queryIndex(idx, params) {
+  const lists = tokenize(params.q).map((t) => prefixPostings(idx, t));
+  if (params.sourceType !== "all") lists.push(facet(idx, "type", [params.sourceType]));
+  if (params.onlyNew) lists.push(facet(idx, "status", ["new"]));
+  if (params.hasFunding !== "") {
+    lists.push(facet(idx, "funding", params.hasFunding === "1" ? ["funded", "self_funded"] : ["unknown"]));
+  }
+  const ms = parseInt(params.minScore || 0, 10);
+  if (ms > 0) {
+    const step = idx.score_bucket || 10;
+    const floor = Math.floor(ms / step) * step;
+    lists.push(facet(idx, "score", Object.keys(idx.facets?.score || {}).filter((b) => +b >= floor)));
+  }
+  if (!lists.length) return null;
+  lists.sort((a, b) => a.length - b.length);
+  return new Set(lists.reduce(intersect));
+}
 
 // 小徽标
 function Tag({ children, className = "" }) {
@@ -57,10 +164,38 @@ function useLocalProfile() {
   return [list, setList];
 }
 
-// 顶部筛选条（新增：Only New / Source Type）
-function Filters({ params, setParams }) {
+// 顶部筛选条（新增：Only New / Source Type / Ranking）
+function Filters({ params, setParams, rankings }) {
+  const profiles = Object.entries(rankings?.profiles || {});
   return (
     <div className="flex gap-3 flex-wrap items-end bg-white rounded-2xl shadow p-4">
+      <div>
+        <label className="text-xs text-gray-500">Search 搜索</label>
+        <input
+          className="block border rounded px-3 py-2 w-56"
+          placeholder="e.g. clinical ux"
+          value={params.q}
+          onChange={(e) => setParams((p) => ({ ...p, q: e.target.value }))}
+        />
+      </div>
+
+      {profiles.length > 1 && (
+        <div>
+          <label className="text-xs text-gray-500">Ranking 排序画像</label>
+          <select
+            className="block border rounded px-3 py-2"
+            value={params.ranking}
+            onChange={(e) => setParams((p) => ({ ...p, ranking: e.target.value }))}
+          >
+            {profiles.map(([k, v]) => (
+              <option key={k} value={k}>
+                {v.label || k}
+              </option>
+            ))}
+          </select>
+        </div>
+      )}
+
       <div>
         <label className="text-xs text-gray-500">Funding 资助</label>
         <select
@@ -159,8 +294,9 @@ function ProfileEditor({ list, setList }) {
   );
 }
 
-// 单条卡片（新版字段：ai_summary / summary / papers / source / score / is_new）
-function Card({ item, profile }) {
+// 单条卡片（新版字段：ai_summary / summary / papers / source / score / is_new / is_updated）
+// rankScore：选择了非默认画像排名时该条在画像 Top-K 中的分数（[label, score]），其余情况为 undefined
+function Card({ item, profile, rankScore }) {
   // 兼容旧字段名
   const university =
     item.university || item.org || item.school || "Unknown University";
@@ -170,6 +306,7 @@ function Card({ item, profile }) {
   const source = item.source || "source";
   const score = item.score ?? item.match_score ?? 0;
   const isNew = !!item.is_new;
+  const isUpdated = !isNew && !!item.is_updated;
   const aiSummary = item.ai_summary;
   const summary = item.summary;
 
@@ -194,8 +331,15 @@ function Card({ item, profile }) {
         <h3 className="text-lg font-semibold">{university}</h3>
         <div className="flex items-center gap-2">
           {isNew && <Tag className="bg-green-100 text-green-700">NEW</Tag>}
+          {isUpdated && <Tag className="bg-amber-100 text-amber-700">UPDATED</Tag>}
           <Tag className="bg-slate-100 text-slate-700">{source}</Tag>
-          <Tag className="bg-indigo-100 text-indigo-700">Score: {score}</Tag>
+          {rankScore ? (
+            <Tag className="bg-indigo-100 text-indigo-700" title={`Default score: ${score}`}>
+              {rankScore[0]}: {rankScore[1]}
+            </Tag>
+          ) : (
+            <Tag className="bg-indigo-100 text-indigo-700">Score: {score}</Tag>
+          )}
         </div>
       </div>
 
@@ -222,6 +366,26 @@ function Card({ item, profile }) {
         <p className="mt-2 text-sm text-gray-700">{summary}</p >
       )}
 
+      {/* 近似重复合并：同一职位在其他来源的链接 */}
+      {Array.isArray(item.links) && item.links.length > 1 && (
+        <div className="text-xs text-gray-500 flex flex-wrap gap-2">
+          Also on:
+          {item.links
+            .filter((l) => l.link !== item.link)
+            .map((l, i) => (
+              <a
+                key={i}
+                href={l.link}
+                target="_blank"
+                rel="noopener noreferrer"
+                className="text-blue-600 underline"
+              >
+                {l.source}
+              </a>
+            ))}
+        </div>
+      )}
+
       {/* 代表论文 */}
       {Array.isArray(item.papers) && item.papers.length > 0 && (
         <div className="mt-2">
@@ -248,28 +412,76 @@ function Card({ item, profile }) {
   );
 }
 
+// 画像排名：该画像 Top-K 在前（按其分数顺序），其余保持默认顺序
+function rankBy(arr, rankings, ranking) {
+  const top = rankings?.profiles?.[ranking]?.top;
+  if (ranking === "default" || !top) return arr;
+  const pos = new Map(top.map(([id], i) => [id, i]));
+  const key = (x) => (pos.has(x.id) ? pos.get(x.id) : top.length);
+  return arr
+    .map((x, i) => [x, i])
+    .sort((a, b) => key(a[0]) - key(b[0]) || a[1] - b[1])
+    .map(([x]) => x);
+}
+
 function App() {
-  const [data, setData] = useState({ items: [], by_source: {}, total_items: 0 });
+  const [data, setData] = useState(EMPTY_DATA);
   const [loading, setLoading] = useState(true);
   const [params, setParams] = useState({
     hasFunding: "",
     minScore: 0,
     sourceType: "all", // all / academic / social
     onlyNew: false,
+    ranking: "default",
+    q: "",
   });
   const [profile, setProfile] = useLocalProfile();
+  const [rankings, setRankings] = useState(null);
+  const [index, setIndex] = useState(null);
 
   useEffect(() => {
-    fetch(DATA_URL)
-      .then((r) => r.json())
-      .then((js) => setData(js || { items: [], by_source: {}, total_items: 0 }))
-      .catch(() => setData({ items: [], by_source: {}, total_items: 0 }))
-      .finally(() => setLoading(false));
+    let alive = true;
+    const onData = (js) => {
+      if (!alive) return;
+      setData(js || EMPTY_DATA);
+      setLoading(false);
+    };
+    loadSharded(onData)
+      .catch(() => getJSON(DATA_URL).then(onData))
+      .catch(() => onData(EMPTY_DATA));
+    // 各画像预计算排名（可选文件，缺失时只有默认排序）
+    getJSON(RANKINGS_URL)
+      .then((js) => alive && setRankings(js))
+      .catch(() => {});
+    getJSON(SEARCH_INDEX_URL)
+      .then((js) => alive && setIndex(js))
+      .catch(() => {});
+    return () => {
+      alive = false;
+    };
   }, []);
 
   const items = useMemo(() => {
     let arr = [...(data.items || [])];
 
+    // 有与数据同一轮生成的倒排索引时求交集；否则退回逐条扫描
+    if (index && index.generated_at === data.generated_at) {
+      const hit = queryIndex(index, params);
+      if (hit) arr = arr.filter((x, i) => hit.has(x.rank ?? i));
+      const ms = parseInt(params.minScore || 0, 10);
+      if (ms > 0) arr = arr.filter((x) => (x.score ?? x.match_score ?? 0) >= ms);
+      return rankBy(arr, rankings, params.ranking);
+    }
+
+    // 搜索
+    const toks = tokenize(params.q);
+    if (toks.length) {
+      arr = arr.filter((x) => {
+        const words = tokenize(`${x.title || ""} ${x.description || ""} ${(x.keywords || []).join(" ")}`);
+        return toks.every((t) => words.some((w) => w.startsWith(t)));
+      });
+    }
+
     // Source 过滤
     if (params.sourceType === "academic") {
       arr = arr.filter((x) => !x.social);
@@ -303,14 +515,21 @@ function App() {
       arr = arr.filter((x) => (x.score ?? x.match_score ?? 0) >= ms);
     }
 
-    return arr;
-  }, [data, params]);
+    return rankBy(arr, rankings, params.ranking);
+  }, [data, params, rankings, index]);
+
+  // 画像排名时卡片显示该画像的分数（与排序一致）；不在 Top-K 内的仍显示默认分数
+  const rankScores = useMemo(() => {
+    const p = rankings?.profiles?.[params.ranking];
+    if (params.ranking === "default" || !p?.top) return null;
+    return new Map(p.top.map(([id, sc]) => [id, [p.label || params.ranking, sc]]));
+  }, [rankings, params.ranking]);
 
   return (
     <div className="max-w-6xl mx-auto p-6 space-y-6">
       <Header />
 
-      <Filters params={params} setParams={setParams} />
+      <Filters params={params} setParams={setParams} rankings={rankings} />
 
       <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
         <ProfileEditor list={profile} setList={setProfile} />
@@ -335,7 +554,7 @@ function App() {
       ) : (
         <section className="grid grid-cols-1 md:grid-cols-2 xl-grid-cols-3 gap-4">
           {items.map((it, idx) => (
-            <Card key={it.id || idx} item={it} profile={profile} />
+            <Card key={it.id || idx} item={it} profile={profile} rankScore={rankScores?.get(it.id)} />
           ))}
         </section>
       )}